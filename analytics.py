@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+# --- EQUITY CURVE ---
+# Both helpers work on a per-day frame indexed by (normalized) day with
+# `total_points` and `core_met` columns -- the shape of `daily_summary`.
+
+def equity_curve(daily, end_date, base_rent):
+    # Returns one row per calendar day from the first logged day to end_date:
+    # core_met, gated points, net-of-rent points and cumulative equity.
+    if daily.empty:
+        return pd.DataFrame({'date': pd.DatetimeIndex([]), 'core_met': [], 'points': [], 'net': [], 'Equity': []})
+    start = daily.index.min()
+    days = pd.date_range(start, pd.Timestamp(end_date).normalize())
+    offsets = (daily.index - start).days.to_numpy()
+    in_range = offsets < len(days)
+
+    core_met = np.zeros(len(days), dtype=bool)
+    points = np.zeros(len(days), dtype=np.int64)
+    core_met[offsets[in_range]] = daily['core_met'].to_numpy()[in_range] > 0
+    points[offsets[in_range]] = daily['total_points'].to_numpy()[in_range]
+
+    net = np.where(core_met, points, 0) - base_rent
+    return pd.DataFrame({'date': days, 'core_met': core_met, 'points': points, 'net': net, 'Equity': np.cumsum(net)})
+
+# --- CONSISTENCY HEATMAP ---
+# Ranges offered by the dashboard, in days back from today (None: everything).
+# Long spans switch to coarser cells so the grid stays a few hundred cells.
+HEATMAP_RANGES = {"12 Weeks": 84, "Year": 365, "All": None}
+DAILY_MAX_DAYS = 371
+WEEKLY_MAX_DAYS = 5 * 366
+
+def heatmap_resolution(first_day, end_date):
+    span = (pd.Timestamp(end_date) - pd.Timestamp(first_day)).days + 1
+    if span <= DAILY_MAX_DAYS: return "day"
+    return "week" if span <= WEEKLY_MAX_DAYS else "month"
+
+def bucket_start(day, resolution):
+    day = pd.Timestamp(day).normalize()
+    if resolution == "week": return day - pd.Timedelta(days=day.weekday())
+    if resolution == "month": return day.replace(day=1)
+    return day
+
+def heatmap_start(first_day, resolution):
+    # Daily grids start on a Monday so every week column is complete.
+    return bucket_start(first_day, "week" if resolution == "day" else resolution)
+
+def heatmap_grid(durations, first_day, end_date, resolution="day"):
+    # durations: minutes per bucket, indexed by bucket start. Returns one row
+    # per bucket from first_day to end_date with x/y cell coordinates:
+    # day -> (week, weekday), week -> (ISO week, year), month -> (month, year).
+    freq = {"day": "D", "week": "W-MON", "month": "MS"}[resolution]
+    start = heatmap_start(first_day, resolution)
+    buckets = pd.date_range(start, pd.Timestamp(end_date).normalize(), freq=freq)
+    grid = durations.reindex(buckets, fill_value=0).rename_axis('date').reset_index(name='duration')
+    if resolution == "day":
+        grid['x'] = grid['date'] - pd.to_timedelta(grid['date'].dt.dayofweek, unit='D')
+        grid['y'] = grid['date'].dt.dayofweek
+    elif resolution == "week":
+        iso = grid['date'].dt.isocalendar()
+        grid['x'], grid['y'] = iso['week'].astype(int), iso['year'].astype(int)
+    else:
+        grid['x'], grid['y'] = grid['date'].dt.month, grid['date'].dt.year
+    return grid
@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import db
+import ledger
+import scoring
+
+# --- LOCAL JSON API ---
+# A small HTTP service for automations (timers, phone shortcuts, cron) that
+# need to log a session or read the dashboard's numbers without a page rerun.
+# Every endpoint calls the same ledger functions as the UI. Started from
+# app.py (set PORTFOLIO_API_PORT) it runs inside the Streamlit process and
+# shares its connection pool, read cache and ledger writer; `python api.py`
+# runs it on its own. Any endpoint takes ?portfolio=<name>.
+HOST = "127.0.0.1"
+PORT = 8765
+PORT_ENV = "PORTFOLIO_API_PORT"
+TOKEN_ENV = "PORTFOLIO_API_TOKEN"    # if set, requests need "Authorization: Bearer <token>"
+MAX_BODY = 1 << 20
+MAX_BATCH = 1_000
+DEFAULT_SLEEP = 7.0                  # the sidebar slider's default
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# --- ENDPOINTS ---
+def _field(body, name, kind, default=None, required=False):
+    value = body.get(name, default)
+    if value is None:
+        if required: raise ApiError(400, f"'{name}' is required.")
+        return None
+    try: return kind(value)
+    except (TypeError, ValueError): raise ApiError(400, f"'{name}' must be {kind.__name__}.") from None
+
+def _session(body):
+    if not isinstance(body, dict): raise ApiError(400, "Each session must be a JSON object.")
+    project = _field(body, 'project', str, required=True)
+    tier = _field(body, 'tier', str)
+    if tier is None:
+        tasks = ledger.get_active_tasks()
+        match = tasks.loc[tasks['name'] == project, 'tier']
+        if match.empty: raise ApiError(404, f"No active asset named {project!r}.")
+        tier = match.iloc[0]
+    duration = _field(body, 'duration', int, required=True)
+    if duration < 0: raise ApiError(400, "'duration' must not be negative.")
+    social_subtype = _field(body, 'social_subtype', str)
+    if tier == "Social" and social_subtype not in scoring.SOCIAL_POINTS:
+        raise ApiError(400, f"'social_subtype' must be one of: {', '.join(scoring.SOCIAL_POINTS)}.")
+    return scoring.Session(project, tier, duration, _field(body, 'sleep_hours', float, DEFAULT_SLEEP),
+                           social_subtype, _field(body, 'notes', str, ""))
+
+def get_health(body):
+    return {'ok': True, 'portfolio': db.current_file()}
+
+def get_analytics(body):
+    snap = ledger.load_snapshot()
+    exam_active, exam_until = snap.exam_mode
+    return {'today_alpha': snap.today_alpha, 'gatekeeper_open': snap.core_met,
+            'deep_work_tokens': snap.tokens, 'deep_work_token_cap': ledger.WEEKLY_TOKEN_CAP,
+            'social_ema': round(float(snap.social_ema), 4), 'social_ema_target': ledger.SOCIAL_EMA_TARGET,
+            'rent': snap.rent, 'needle_today': snap.needle_today, 'needle_yesterday': snap.needle_yesterday,
+            'exam_mode': exam_active, 'exam_mode_until': exam_until.isoformat() if exam_until else None}
+
+def post_log(body):
+    session = _session(body)
+    points = ledger.log_work(session.project, session.duration, session.notes, session.tier,
+                             session.sleep_hours, session.social_subtype)
+    return {'points': points}
+
+def post_log_batch(body):
+    sessions = body.get('sessions')
+    if not isinstance(sessions, list) or not sessions: raise ApiError(400, "'sessions' must be a non-empty list.")
+    if len(sessions) > MAX_BATCH: raise ApiError(413, f"At most {MAX_BATCH} sessions per batch.")
+    points = ledger.log_work_batch([_session(s) for s in sessions])
+    return {'points': points, 'total': sum(points)}
+
+def post_needle(body):
+    if ledger.check_needle_status(): return {'moved': True, 'already': True}
+    ledger.set_needle_status(True)
+    return {'moved': True, 'already': False}
+
+def get_bounties(body):
+    bounties = ledger.get_open_bounties()
+    return {'bounties': [{'name': n, 'value': int(v)} for n, v in zip(bounties['name'], bounties['value'])]}
+
+def post_bounty(body):
+    name = _field(body, 'name', str, required=True).strip()
+    if not name: raise ApiError(400, "'name' must not be empty.")
+    value = _field(body, 'value', int, required=True)
+    if not ledger.manage_bounty("add", name, value): raise ApiError(409, f"A bounty named {name!r} already exists.")
+    return {'name': name, 'value': value}
+
+def post_bounty_claim(body):
+    name = _field(body, 'name', str, required=True)
+    if name not in set(ledger.get_open_bounties()['name']): raise ApiError(404, f"No open bounty named {name!r}.")
+    return {'name': name, 'points': int(ledger.manage_bounty("claim", name))}
+
+def post_undo(body):
+    reverted = ledger.undo_last_log()
+    return {'reverted': {'project': reverted[0], 'points': reverted[1]} if reverted else None}
+
+ROUTES = {
+    ("GET", "/health"): get_health,
+    ("GET", "/analytics"): get_analytics,
+    ("GET", "/bounties"): get_bounties,
+    ("POST", "/log"): post_log,
+    ("POST", "/log/batch"): post_log_batch,
+    ("POST", "/needle"): post_needle,
+    ("POST", "/bounties"): post_bounty,
+    ("POST", "/bounties/claim"): post_bounty_claim,
+    ("POST", "/undo"): post_undo,
+}
+
+# --- SERVER ---
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"    # keep-alive, so a client pays for one connection
+    disable_nagle_algorithm = True   # headers and body go out as separate writes
+    server_version = "PortfolioAPI/1"
+
+    def do_GET(self): self._handle("GET")
+    def do_POST(self): self._handle("POST")
+
+    def log_message(self, fmt, *args): pass
+
+    def _body(self):
+        # Read before any check can fail: under keep-alive an unread body
+        # would be parsed as the start of the next request. One too large to
+        # read ends the connection instead.
+        try: length = int(self.headers.get("Content-Length") or 0)
+        except ValueError: length = -1
+        if length < 0 or length > MAX_BODY:
+            self.close_connection = True
+            if length < 0: raise ApiError(400, "Bad Content-Length.")
+            raise ApiError(413, "Request body too large.")
+        return self.rfile.read(length) if length else b""
+
+    def _json(self, raw):
+        if not raw: return {}
+        try: body = json.loads(raw)
+        except (ValueError, UnicodeDecodeError): raise ApiError(400, "Body must be JSON.") from None
+        if not isinstance(body, dict): raise ApiError(400, "Body must be a JSON object.")
+        return body
+
+    def _handle(self, method):
+        url = urlparse(self.path)
+        try:
+            raw = self._body()
+            endpoint = ROUTES.get((method, url.path.rstrip("/") or "/"))
+            if endpoint is None: raise ApiError(404, f"No endpoint {method} {url.path}.")
+            token = os.environ.get(TOKEN_ENV)
+            if token and self.headers.get("Authorization") != f"Bearer {token}": raise ApiError(401, "Missing or wrong token.")
+            body = self._json(raw)
+            # Portfolios are created from the dashboard (or portfolios.py), never implicitly here.
+            portfolio = parse_qs(url.query).get('portfolio', [db.DEFAULT_PORTFOLIO])[-1]
+            if portfolio not in db.list_portfolios(): raise ApiError(404, f"No portfolio named {portfolio!r}.")
+            db.use_portfolio(portfolio)
+            ledger.init_db()
+            status, result = 200, endpoint(body)
+        except ApiError as e: status, result = e.status, {'error': str(e)}
+        except TimeoutError as e: status, result = 503, {'error': str(e)}
+        except Exception as e: status, result = 500, {'error': f"{type(e).__name__}: {e}"}
+        payload = json.dumps(result).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if self.close_connection: self.send_header("Connection", "close")
+        self.end_headers()
+        self.wfile.write(payload)
+
+_server = None
+_lock = threading.Lock()
+
+def start(host=HOST, port=PORT):
+    # Serves from a daemon thread; later calls return the running server.
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), Handler)
+            threading.Thread(target=_server.serve_forever, name="portfolio-api", daemon=True).start()
+    return _server
+
+_tried = False
+
+def start_from_env():
+    # For app.py: starts the API once per process if PORTFOLIO_API_PORT is set.
+    global _tried
+    port = os.environ.get(PORT_ENV)
+    if not port or _tried: return _server
+    _tried = True
+    try: return start(os.environ.get("PORTFOLIO_API_HOST", HOST), int(port))
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Local API not started on port {port}: {e}", file=sys.stderr)
+        return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the ledger as a local JSON API.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--db", default=db.DB_FILE)
+    args = parser.parse_args()
+    db.DB_FILE = args.db
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"✅ Serving on http://{args.host}:{args.port} ({', '.join(f'{m} {p}' for m, p in ROUTES)})")
+    try: server.serve_forever()
+    except KeyboardInterrupt: pass
+    finally: server.server_close()
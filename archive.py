@@ -0,0 +1,266 @@
+import argparse
+import functools
+import os
+import sys
+from datetime import date
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+import db
+import rollup
+
+# --- COLD TIER ---
+# Closed months can be moved out of `logs` into one compressed NumPy file
+# each, next to the database (portfolio.db -> portfolio.archive/2024-03.1.npz).
+# Every column is a plain typed array: projects are stored as codes plus their
+# names, notes as one UTF-8 buffer plus offsets, so nothing is pickled and
+# nothing comes back as object dtype. The `archived_months` table (see
+# db.create_tables) says which file holds each month and is only changed in
+# the transaction that moves the rows, so a reader sees every row exactly
+# once even if a run dies halfway.
+# The day rollup keeps archived days (see rollup.archived_summary), so the
+# dashboard charts cover all history without opening a single partition.
+KEEP_MONTHS = 2          # the current month and the one before stay hot
+COLUMNS = ("id", "ts", "project", "duration", "points", "notes")
+
+def archive_dir(db_file=None):
+    return os.path.splitext(db_file or db.current_file())[0] + ".archive"
+
+def month_bounds(month):
+    # "YYYY-MM" as the half-open ts range [first day, first day of next month).
+    first = date.fromisoformat(month + "-01")
+    after = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+    return db.day_bounds(first)[0], db.day_bounds(after)[0]
+
+# --- PARTITION FILES ---
+def _pack(strings):
+    encoded = [s.encode() for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def write_month(path, frame):
+    codes, projects = pd.factorize(frame['project'].fillna(""))
+    notes, notes_offsets = _pack(frame['notes'].fillna("").tolist())
+    with open(path, "wb") as f:
+        np.savez_compressed(f, id=frame['id'].to_numpy(np.int64), ts=frame['ts'].to_numpy(np.int64),
+                            duration=frame['duration'].fillna(0).to_numpy(np.int32),
+                            points=frame['points'].fillna(0).to_numpy(np.int32),
+                            project=codes.astype(np.int32), projects=np.asarray(projects, dtype=str),
+                            notes=notes, notes_offsets=notes_offsets)
+
+def read_month(path, columns=COLUMNS, first_ts=None, last_ts=None):
+    # Only the requested columns are decompressed; notes are decoded only for
+    # the rows inside [first_ts, last_ts).
+    with np.load(path, allow_pickle=False) as f:
+        keep = slice(None)
+        if first_ts is not None or last_ts is not None:
+            ts = f['ts']
+            keep = np.ones(len(ts), dtype=bool)
+            if first_ts is not None: keep &= ts >= first_ts
+            if last_ts is not None: keep &= ts < last_ts
+        data = {}
+        for col in columns:
+            if col == 'project': data[col] = pd.Categorical.from_codes(f['project'][keep], f['projects'])
+            elif col == 'notes':
+                offsets = f['notes_offsets']
+                blob = f['notes'].tobytes()
+                data[col] = pd.array([blob[a:b].decode() for a, b in zip(offsets[:-1][keep].tolist(), offsets[1:][keep].tolist())],
+                                     dtype="str")
+            elif col in ('duration', 'points'): data[col] = pd.to_numeric(f[col][keep], downcast='integer')
+            else: data[col] = f[col][keep]
+    return pd.DataFrame(data, columns=list(columns))
+
+def id_range(path):
+    # (lowest, highest) id in a partition, read once per file. A restored and
+    # re-archived month reuses its name, so the key includes mtime and size.
+    stat = os.stat(path)
+    return _id_range(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+@functools.lru_cache(maxsize=4096)
+def _id_range(path, mtime_ns, size):
+    with np.load(path, allow_pickle=False) as f:
+        ids = f['id']
+        return int(ids.min()), int(ids.max())
+
+# --- TYPED FRAMES ---
+# Every reader hands back the same compact dtypes: ids and timestamps as
+# int64, project as a category over the tasks table (plus the system
+# pseudo-assets and anything since delisted), duration and points downcast
+# to the smallest integer that holds them, and notes only when asked for.
+SYSTEM_PROJECTS = ("System", "Bounty Hunt")
+
+def project_categories():
+    names = {row[0] for row in db.query("SELECT name FROM tasks")}
+    return sorted(names.union(SYSTEM_PROJECTS))
+
+def _typed(frame, categories=None):
+    for col in ('id', 'ts'):
+        if col in frame: frame[col] = frame[col].astype('int64')
+    for col in ('duration', 'points'):
+        if col in frame: frame[col] = pd.to_numeric(frame[col].fillna(0), downcast='integer')
+    if 'project' in frame:
+        values = frame['project'].fillna("")
+        categories = list(categories or project_categories())
+        categories += sorted(set(values.unique()).difference(categories))
+        frame['project'] = pd.Categorical(values, categories=categories)
+    if 'notes' in frame: frame['notes'] = frame['notes'].fillna("").astype("str")
+    return frame
+
+def _concat(frames, columns):
+    data = {}
+    for col in columns:
+        parts = [frame[col] for frame in frames]
+        if col == 'project': data[col] = union_categoricals(parts)
+        else: data[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(data, columns=list(columns))
+
+# --- UNIFIED READER ---
+def partitions(first_ts=None, last_ts=None, db_file=None):
+    # (month, path) of the archived months overlapping [first_ts, last_ts), oldest first.
+    try:
+        rows = db.query("SELECT month, file FROM archived_months WHERE last_ts >= ? AND first_ts < ? ORDER BY month",
+                        (-(1 << 62) if first_ts is None else first_ts, (1 << 62) if last_ts is None else last_ts))
+    except db.sqlite3.OperationalError: return []
+    folder = archive_dir(db_file)
+    return [(month, os.path.join(folder, name)) for month, name in rows]
+
+def read_hot(first_ts=None, last_ts=None, columns=COLUMNS):
+    where, params = [], []
+    if first_ts is not None: where.append("ts >= ?"); params.append(first_ts)
+    if last_ts is not None: where.append("ts < ?"); params.append(last_ts)
+    sql = f"SELECT {', '.join(columns)} FROM logs" + (" WHERE " + " AND ".join(where) if where else "")
+    return _typed(db.read_sql(sql + " ORDER BY ts", tuple(params)))
+
+def read_cold(first_ts=None, last_ts=None, columns=COLUMNS):
+    # Archived logs in [first_ts, last_ts), or None if no partition overlaps it.
+    frames = [read_month(path, columns, first_ts, last_ts) for _, path in partitions(first_ts, last_ts)]
+    return _concat(frames, columns) if frames else None
+
+def read_logs(first_ts=None, last_ts=None, columns=COLUMNS):
+    # Hot and cold logs in [first_ts, last_ts) (either end open if None) as
+    # one typed frame ordered by ts. Only the partitions that overlap the
+    # range are opened.
+    wanted = tuple(columns) if 'ts' in columns else tuple(columns) + ('ts',)
+    logs = read_hot(first_ts, last_ts, wanted)
+    cold = read_cold(first_ts, last_ts, wanted)
+    if cold is not None: logs = _concat([cold, logs], wanted).sort_values('ts', kind='stable', ignore_index=True)
+    return logs[list(columns)]
+
+# --- MOVING MONTHS ---
+def _archive_month(c, month, folder):
+    # Runs inside the caller's transaction. Returns (rows moved, new file,
+    # superseded file to delete once the transaction has committed).
+    first_ts, last_ts = month_bounds(month)
+    c.execute(f"SELECT {', '.join(COLUMNS)} FROM logs WHERE ts >= ? AND ts < ? ORDER BY ts", (first_ts, last_ts))
+    hot = _typed(pd.DataFrame(c.fetchall(), columns=list(COLUMNS)))
+    if hot.empty: return 0, None, None
+    c.execute("SELECT file, version FROM archived_months WHERE month = ?", (month,))
+    previous = c.fetchone()
+    frames = [hot]
+    # Rows written into a month after it was archived join its partition.
+    if previous: frames.insert(0, read_month(os.path.join(folder, previous[0])))
+    rows = _concat(frames, COLUMNS).sort_values('ts', kind='stable', ignore_index=True)
+    version = previous[1] + 1 if previous else 1
+    path = os.path.join(folder, f"{month}.{version}.npz")
+    write_month(path, rows)
+
+    try:
+        day_range = tuple(d.isoformat() for d in _month_days(month))
+        c.execute("DELETE FROM archived_summary WHERE day >= ? AND day <= ?", day_range)
+        c.execute(f"INSERT INTO archived_summary ({rollup.SUMMARY_COLUMNS}) "
+                  f"SELECT {rollup.SUMMARY_COLUMNS} FROM daily_summary WHERE day >= ? AND day <= ?", day_range)
+        c.execute("DELETE FROM archived_project_summary WHERE day >= ? AND day <= ?", day_range)
+        c.execute(f"INSERT INTO archived_project_summary ({rollup.PROJECT_COLUMNS}) "
+                  f"SELECT {rollup.PROJECT_COLUMNS} FROM project_summary WHERE day >= ? AND day <= ?", day_range)
+        c.execute("DELETE FROM logs WHERE ts >= ? AND ts < ?", (first_ts, last_ts))
+        c.execute("INSERT OR REPLACE INTO archived_months (month, file, version, rows, first_ts, last_ts, archived) "
+                  "VALUES (?, ?, ?, ?, ?, ?, datetime('now'))",
+                  (month, os.path.basename(path), version, len(rows), int(rows['ts'].iloc[0]), int(rows['ts'].iloc[-1])))
+    except BaseException:
+        os.remove(path)
+        raise
+    return len(hot), path, os.path.join(folder, previous[0]) if previous else None
+
+def _month_days(month):
+    first_ts, last_ts = month_bounds(month)
+    return db.from_day_number(first_ts // db.DAY_US), db.from_day_number(last_ts // db.DAY_US - 1)
+
+def archive(keep_months=KEEP_MONTHS, today=None, progress=print):
+    # Moves every month older than the newest keep_months out of `logs`, one
+    # transaction per month. Returns the number of rows moved.
+    if keep_months < 1: raise ValueError("At least the current month has to stay hot.")
+    today = today or date.today()
+    index = today.year * 12 + today.month - keep_months
+    cutoff = db.day_bounds(date(index // 12, index % 12 + 1, 1))[0]
+    folder = archive_dir()
+    os.makedirs(folder, exist_ok=True)
+    db.init_schema()
+    months = [row[0] for row in db.query(
+        "SELECT DISTINCT strftime('%Y-%m', day * 86400, 'unixepoch') FROM logs WHERE ts < ? ORDER BY 1", (cutoff,))]
+    moved = 0
+    for month in months:
+        path = None
+        try:
+            with db.transaction() as c: rows, path, superseded = _archive_month(c, month, folder)
+        except BaseException:
+            # The commit failed: nothing points at the new partition.
+            if path: os.remove(path)
+            raise
+        if superseded: os.remove(superseded)
+        moved += rows
+        if rows: progress(f"🧊 {month}: {rows:,} rows archived to {path}")
+    return moved
+
+def restore(month, progress=print):
+    # Moves an archived month back into `logs` (ids and all). The text
+    # timestamp column is regenerated from ts.
+    folder = archive_dir()
+    with db.transaction() as c:
+        c.execute("SELECT file FROM archived_months WHERE month = ?", (month,))
+        row = c.fetchone()
+        if row is None: raise ValueError(f"{month} is not archived.")
+        rows = read_month(os.path.join(folder, row[0]))
+        ts = rows['ts'].tolist()
+        c.executemany("INSERT INTO logs (id, timestamp, ts, day, project, duration, points, notes) "
+                      "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                      zip(rows['id'].tolist(), (db.from_epoch_us(t).isoformat() for t in ts), ts,
+                          (t // db.DAY_US for t in ts), rows['project'].astype(str).tolist(),
+                          rows['duration'].tolist(), rows['points'].tolist(), rows['notes'].tolist()))
+        first_day, last_day = _month_days(month)
+        day_range = (first_day.isoformat(), last_day.isoformat())
+        c.execute("DELETE FROM archived_summary WHERE day >= ? AND day <= ?", day_range)
+        c.execute("DELETE FROM archived_project_summary WHERE day >= ? AND day <= ?", day_range)
+        c.execute("DELETE FROM archived_months WHERE month = ?", (month,))
+        rollup.refresh_range(c, first_day, last_day)
+    os.remove(os.path.join(folder, row[0]))
+    progress(f"♨️ {month}: {len(rows):,} rows restored to the live ledger.")
+    return len(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move closed months of the ledger to (and from) the cold archive.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    p_archive = sub.add_parser("archive")
+    p_archive.add_argument("--keep-months", type=int, default=KEEP_MONTHS, help="months kept hot, counting this one")
+    p_restore = sub.add_parser("restore")
+    p_restore.add_argument("month", help="YYYY-MM")
+    parser.add_argument("--db", default=db.DB_FILE)
+    parser.add_argument("--portfolio", help="portfolio name (overrides --db)")
+    args = parser.parse_args()
+    db.DB_FILE = args.db
+    if args.portfolio: db.use_portfolio(args.portfolio)
+
+    try:
+        if args.command == "list":
+            db.init_schema()
+            for month, name, rows, archived in db.query("SELECT month, file, rows, archived FROM archived_months ORDER BY month"):
+                path = os.path.join(archive_dir(), name)
+                print(f"{month}  {rows:>10,} rows  {os.path.getsize(path) if os.path.exists(path) else 0:>12,} bytes  {archived}")
+        elif args.command == "archive":
+            print(f"✅ {archive(args.keep_months):,} rows moved to {archive_dir()}.")
+        else:
+            restore(args.month)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
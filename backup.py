@@ -0,0 +1,214 @@
+import argparse
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import date
+import db
+
+# --- ONLINE BACKUPS ---
+# Daily snapshots taken with sqlite3's online backup API on a background
+# thread. The copy runs a few pages at a time, so readers and writers keep
+# going, and it is always a consistent image of a committed state. Each
+# snapshot is verified before it replaces anything, optionally gzipped, and
+# old ones are pruned to N daily + M weekly. Archived months live outside the
+# database (see archive.py), so each snapshot also copies the partition files
+# its archived_months table points at into a folder next to it.
+BACKUP_DIR = "backups"
+COMPRESS = True
+KEEP_DAILY = 7
+KEEP_WEEKLY = 4
+PAGES_PER_STEP = 1024
+STEP_SLEEP = 0.005
+RETRY_AFTER = 3600      # seconds before a failed backup is tried again
+
+_done = {}
+_failed = {}            # database file -> monotonic time of its last failed backup
+_running = {}
+_lock = threading.Lock()
+
+def _prefix(db_file):
+    return os.path.splitext(os.path.basename(db_file))[0]
+
+def _folder(db_file, dest_dir):
+    # The default DB's snapshots sit in dest_dir itself; every other file
+    # (each portfolio) gets a folder of its own, so a portfolio named like
+    # the default DB never shares, skips or prunes its snapshots.
+    if os.path.abspath(db_file) == os.path.abspath(db.DB_FILE): return dest_dir
+    return os.path.join(dest_dir, _prefix(db_file))
+
+def backup_path(db_file, day, dest_dir=BACKUP_DIR, compress=COMPRESS):
+    return os.path.join(_folder(db_file, dest_dir), f"{_prefix(db_file)}_{day.isoformat()}.db" + (".gz" if compress else ""))
+
+def list_backups(db_file, dest_dir=BACKUP_DIR):
+    # (day, path) for every snapshot of db_file, newest first.
+    pattern = re.compile(re.escape(_prefix(db_file)) + r"_(\d{4}-\d{2}-\d{2})\.db(\.gz)?$")
+    folder = _folder(db_file, dest_dir)
+    found = []
+    if not os.path.isdir(folder): return found
+    for name in os.listdir(folder):
+        m = pattern.match(name)
+        if m: found.append((date.fromisoformat(m.group(1)), os.path.join(folder, name)))
+    return sorted(found, reverse=True)
+
+def cold_path(path):
+    # The folder holding a snapshot's copies of the archive partitions. To
+    # restore, put the snapshot back as <db> and this folder as <db>.archive.
+    return os.path.splitext(path[:-3] if path.endswith(".gz") else path)[0] + ".archive"
+
+def _partitions(path):
+    # Partition files the database at `path` points at (none before any archive run).
+    conn = sqlite3.connect(path)
+    try: return [row[0] for row in conn.execute("SELECT file FROM archived_months")]
+    except sqlite3.OperationalError: return []
+    finally: conn.close()
+
+def _check(path):
+    # An empty file opens as a valid, empty database; that is not a backup.
+    if not os.path.getsize(path): return False
+    conn = sqlite3.connect(path)
+    try: return conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    except sqlite3.DatabaseError: return False
+    finally: conn.close()
+
+def _check_cold(db_path, folder):
+    # Every partition the snapshot points at is there and reads back intact.
+    for name in _partitions(db_path):
+        try:
+            with zipfile.ZipFile(os.path.join(folder, name)) as f:
+                if f.testzip() is not None: return False
+        except (OSError, zipfile.BadZipFile): return False
+    return True
+
+def verify(path):
+    if not path.endswith(".gz"): return _check(path) and _check_cold(path, cold_path(path))
+    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
+        try:
+            with gzip.open(path, "rb") as src: shutil.copyfileobj(src, tmp)
+        except (OSError, EOFError):
+            tmp.close()
+            os.remove(tmp.name)
+            return False
+    try: return _check(tmp.name) and _check_cold(tmp.name, cold_path(path))
+    finally: os.remove(tmp.name)
+
+def _copy_cold(db_file, snapshot, folder):
+    # Copies the partitions `snapshot` points at into `folder` (via a .tmp
+    # folder, so a half-copied set never sits under the real name).
+    files = _partitions(snapshot)
+    if os.path.isdir(folder): shutil.rmtree(folder)
+    if not files: return
+    import archive
+    source = archive.archive_dir(db_file)
+    tmp = folder + ".tmp"
+    if os.path.isdir(tmp): shutil.rmtree(tmp)
+    os.makedirs(tmp)
+    # A file archive.py superseded since the snapshot was taken is gone:
+    # that fails this backup, and the next attempt copies the newer one.
+    for name in files: shutil.copy2(os.path.join(source, name), os.path.join(tmp, name))
+    os.replace(tmp, folder)
+
+def take_backup(db_file, day=None, dest_dir=BACKUP_DIR, compress=COMPRESS):
+    # Returns the snapshot path. Work happens in *.tmp files, so a failed or
+    # interrupted run never leaves a half-written backup under the real name.
+    day = day or date.today()
+    final = backup_path(db_file, day, dest_dir, compress)
+    os.makedirs(os.path.dirname(final) or ".", exist_ok=True)
+    raw = final[:-3] if compress else final
+    tmp = raw + ".tmp"
+
+    src = sqlite3.connect(db_file, timeout=30)
+    dst = sqlite3.connect(tmp)
+    try: src.backup(dst, pages=PAGES_PER_STEP, sleep=STEP_SLEEP)
+    finally:
+        dst.close()
+        src.close()
+    if not _check(tmp):
+        os.remove(tmp)
+        raise RuntimeError(f"Backup of {db_file} failed its integrity check.")
+    # The partitions land before the snapshot itself, so no snapshot is ever
+    # missing the archived months it refers to.
+    try: _copy_cold(db_file, tmp, cold_path(final))
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+    if compress:
+        with open(tmp, "rb") as f_in, gzip.open(final + ".tmp", "wb", compresslevel=6) as f_out:
+            shutil.copyfileobj(f_in, f_out, 1 << 20)
+        os.remove(tmp)
+        tmp = final + ".tmp"
+    os.replace(tmp, final)
+    return final
+
+def prune(db_file, dest_dir=BACKUP_DIR, keep_daily=KEEP_DAILY, keep_weekly=KEEP_WEEKLY):
+    # Keeps the newest keep_daily snapshots, plus the newest snapshot of each
+    # of the keep_weekly most recent weeks before those. Returns what it removed.
+    backups = list_backups(db_file, dest_dir)
+    keep = {path for _, path in backups[:keep_daily]}
+    weeks = set()
+    for day, path in backups[keep_daily:]:
+        week = day.isocalendar()[:2]
+        if week in weeks or len(weeks) >= keep_weekly: continue
+        weeks.add(week)
+        keep.add(path)
+    removed = [path for _, path in backups if path not in keep]
+    for path in removed:
+        os.remove(path)
+        if os.path.isdir(cold_path(path)): shutil.rmtree(cold_path(path))
+    return removed
+
+def _run(db_file, day):
+    try:
+        if not any(d == day for d, _ in list_backups(db_file)):
+            take_backup(db_file, day)
+            prune(db_file)
+        _done[db_file] = day
+        _failed.pop(db_file, None)
+    except Exception as e:
+        _failed[db_file] = time.monotonic()
+        print(f"⚠️ Backup of {db_file} failed: {e}", file=sys.stderr)
+    finally:
+        with _lock: _running.pop(db_file, None)
+
+def ensure_daily_backup(db_file=None):
+    # Cheap enough for every rerun: after the first call of the day it is a
+    # dict lookup. A failed backup (disk full, corrupt source) is not retried
+    # for RETRY_AFTER seconds. Returns the backup thread if one was started.
+    db_file = db_file or db.current_file()
+    today = date.today()
+    if _done.get(db_file) == today: return None
+    if db_file in _failed and time.monotonic() - _failed[db_file] < RETRY_AFTER: return None
+    with _lock:
+        if db_file in _running or not os.path.exists(db_file): return None
+        thread = _running[db_file] = threading.Thread(target=_run, args=(db_file, today), name="backup", daemon=True)
+    thread.start()
+    return thread
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Take, prune or verify ledger backups.")
+    parser.add_argument("--db", default=db.DB_FILE)
+    parser.add_argument("--portfolio", help="portfolio name (overrides --db)")
+    parser.add_argument("--dir", default=BACKUP_DIR)
+    parser.add_argument("--no-compress", action="store_true")
+    parser.add_argument("--keep-daily", type=int, default=KEEP_DAILY)
+    parser.add_argument("--keep-weekly", type=int, default=KEEP_WEEKLY)
+    parser.add_argument("--verify", nargs="*", metavar="PATH", help="check these backups (default: all of them)")
+    args = parser.parse_args()
+    if args.portfolio: args.db = db.portfolio_file(args.portfolio)
+
+    if args.verify is not None:
+        paths = args.verify or [path for _, path in list_backups(args.db, args.dir)]
+        bad = [path for path in paths if not verify(path)]
+        for path in paths: print(f"{'❌' if path in bad else '✅'} {path}")
+        sys.exit(1 if bad else 0)
+
+    path = take_backup(args.db, dest_dir=args.dir, compress=not args.no_compress)
+    print(f"✅ Backed up {args.db} to {path} ({os.path.getsize(path):,} bytes).")
+    for removed in prune(args.db, args.dir, args.keep_daily, args.keep_weekly): print(f"🗑️ Pruned {removed}")
@@ -0,0 +1,191 @@
+import argparse
+import ast
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date
+import db
+import cache
+import charts
+import ledger
+import seed_data
+
+# --- HOT-PATH BENCHMARKS ---
+# Builds synthetic ledgers with seed_data, points the data layer at each one
+# and times the calls a dashboard rerun makes, headlessly. Every read is timed
+# cold (cache.clear() first), since a warm rerun is just a dict lookup.
+# Results go to a JSON file; --baseline compares against an earlier one.
+WORKDIR = ".bench"
+SIZES = [1_000, 100_000, 1_000_000]
+HISTORY_DAYS = 3650
+SYSTEM_EVENTS_PER_DAY = 0.625
+
+def ledger_file(rows, seed, workdir=WORKDIR):
+    # Built once per size/seed/day and reused; today's date is part of the name
+    # because "today" and "this week" are what the hot paths look at.
+    path = os.path.join(workdir, f"ledger_{rows}_s{seed}_{date.today().isoformat()}.db")
+    if os.path.exists(path): return path
+    os.makedirs(workdir, exist_ok=True)
+    days = min(max(rows // 3, 30), HISTORY_DAYS)
+    events_per_day = max((rows / days - SYSTEM_EVENTS_PER_DAY) / 0.85, 0.1)
+    seed_data.seed_history(days, seed, db_file=path, fresh=True, progress=lambda msg: None,
+                           events_per_day=events_per_day)
+    return path
+
+def _cold(fn):
+    def run():
+        cache.clear()
+        return fn()
+    return run
+
+def _log_work():
+    ledger.log_work("Trading Algos", 45, "bench", "Core", 7.5)
+
+def _equity():
+    return charts.equity_for(date.today())
+
+def _heatmap():
+    return charts.heatmap_for("All")
+
+# name -> (timed call, untimed cleanup)
+CASES = {
+    'get_analytics': (_cold(ledger.get_analytics), None),
+    'log_work': (_log_work, ledger.undo_last_log),
+    'check_needle_status': (_cold(ledger.check_needle_status), None),
+    'check_exam_mode': (_cold(ledger.check_exam_mode), None),
+    'equity_curve': (_cold(_equity), None),
+    'heatmap': (_cold(_heatmap), None),
+}
+
+def _p95(samples):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+
+def measure(fn, cleanup, repeat):
+    fn()
+    if cleanup: cleanup()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+        if cleanup: cleanup()
+
+    # Peak memory on a separate run so tracing overhead stays out of the timings.
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if cleanup: cleanup()
+    return {'median_ms': round(statistics.median(samples), 3), 'p95_ms': round(_p95(samples), 3),
+            'peak_kib': round(peak / 1024, 1), 'runs': repeat}
+
+def run(sizes=SIZES, repeat=15, seed=42, cases=None, progress=print):
+    results = {}
+    for rows in sizes:
+        path = ledger_file(rows, seed)
+        db.close_all()
+        db.DB_FILE = path
+        db.init_schema()
+        actual = db.query_one("SELECT count(*) FROM logs")[0]
+        progress(f"📊 {rows:,} rows ({actual:,} on file)")
+        results[str(rows)] = {}
+        for name in cases or CASES:
+            fn, cleanup = CASES[name]
+            results[str(rows)][name] = r = measure(fn, cleanup, repeat)
+            progress(f"  {name:<22} median {r['median_ms']:>9.2f} ms   p95 {r['p95_ms']:>9.2f} ms   peak {r['peak_kib']:>10,.0f} KiB")
+    db.close_all()
+    return {'created': time.strftime("%Y-%m-%dT%H:%M:%S"), 'python': platform.python_version(),
+            'seed': seed, 'repeat': repeat, 'results': results}
+
+# --- STARTUP ---
+# Cold start is timed in fresh interpreters, less the cost of starting an
+# empty one. The per-rerun cost is app.py's own import block run again in a
+# warm process, which is what every Streamlit rerun pays before drawing.
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def app_imports():
+    with open(os.path.join(HERE, "app.py")) as f: tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+STARTUP = {
+    'app_imports': app_imports,
+    'report_imports': lambda: "import report",
+    'charts_imports': lambda: "import charts",
+}
+
+def _spawn_ms(code):
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=HERE, check=True, capture_output=True)
+    return (time.perf_counter() - started) * 1000
+
+def measure_startup(code, repeat):
+    empty = statistics.median(_spawn_ms("pass") for _ in range(repeat))
+    cold = [max(_spawn_ms(code) - empty, 0) for _ in range(repeat)]
+    compiled = compile(code, "<imports>", "exec")
+    exec(compiled, {})
+    warm = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        exec(compiled, {})
+        warm.append((time.perf_counter() - started) * 1000)
+    return {'median_ms': round(statistics.median(cold), 3), 'p95_ms': round(_p95(cold), 3),
+            'rerun_ms': round(statistics.median(warm), 4), 'runs': repeat}
+
+def run_startup(repeat=15, cases=None, progress=print):
+    progress("🚀 startup")
+    results = {}
+    for name in cases or STARTUP:
+        results[name] = r = measure_startup(STARTUP[name](), repeat)
+        progress(f"  {name:<22} median {r['median_ms']:>9.2f} ms   p95 {r['p95_ms']:>9.2f} ms   rerun {r['rerun_ms']:>9.4f} ms")
+    return results
+
+def compare(report, baseline, threshold, min_ms=1.0, progress=print):
+    # Returns the (size, case, metric) triples that got slower than threshold allows.
+    # Sub-millisecond cases are all noise, so a slowdown must also exceed min_ms.
+    regressions = []
+    for size, cases in report['results'].items():
+        label = f"{int(size):,}" if size.isdigit() else size
+        for name, now in cases.items():
+            before = baseline.get('results', {}).get(size, {}).get(name)
+            if not before: continue
+            for metric in ('median_ms', 'p95_ms'):
+                ratio = now[metric] / before[metric] if before[metric] else 1.0
+                flag = "  ⚠️" if ratio > 1 + threshold and now[metric] - before[metric] > min_ms else ""
+                if flag: regressions.append((size, name, metric))
+                progress(f"  {label:>9} {name:<22} {metric:<9} {before[metric]:>9.2f} → {now[metric]:>9.2f} ms  ({ratio:.2f}x){flag}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the dashboard's data path against synthetic ledgers.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="ledger sizes in rows")
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--case", action="append", choices=list(CASES), help="only run these cases")
+    parser.add_argument("--startup", action="store_true", help="time imports (cold start and per rerun) instead")
+    parser.add_argument("--out", default=os.path.join(WORKDIR, "results.json"))
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before failing (0.2 = 20%%)")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    if args.startup:
+        report = {'created': time.strftime("%Y-%m-%dT%H:%M:%S"), 'python': platform.python_version(),
+                  'repeat': args.repeat, 'results': {'startup': run_startup(args.repeat)}}
+    else: report = run(args.sizes, args.repeat, args.seed, args.case)
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w") as f: json.dump(report, f, indent=2)
+    print(f"✅ Results written to {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f: baseline = json.load(f)
+        print(f"Comparing against {args.baseline}:")
+        regressions = compare(report, baseline, args.threshold, args.min_ms)
+        if regressions:
+            print(f"❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}.")
+            sys.exit(1)
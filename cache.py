@@ -0,0 +1,67 @@
+import dataclasses
+import functools
+import threading
+from collections import OrderedDict
+from datetime import date
+import pandas as pd
+import db
+
+# --- LEDGER-VERSIONED READ CACHE ---
+# Results are keyed on the ledger version of their portfolio's DB file, so a
+# rerun that wrote nothing is served from memory and any commit (from this
+# process or another) makes that portfolio's older entries unreachable.
+# Entries are LRU-bounded and flushed per portfolio on version change.
+MAX_ENTRIES = 1024
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+_versions = {}     # database file -> ledger version its entries were read at
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+def ledger_version(path):
+    # date.today() is part of the version because "today" and "this week"
+    # roll over without anything being written.
+    return (db.write_counts[path], db.data_version(path), date.today())
+
+def _detach(value):
+    # Callers add columns to the frames they get back; hand out shallow copies
+    # so those edits never leak into the cached object.
+    if isinstance(value, pd.DataFrame): return value.copy(deep=False)
+    if isinstance(value, tuple): return tuple(_detach(v) for v in value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.replace(value, **{f.name: _detach(getattr(value, f.name)) for f in dataclasses.fields(value)})
+    return value
+
+def cached(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        path = db.current_file()
+        version = ledger_version(path)
+        key = (path, fn.__qualname__, args, tuple(sorted(kwargs.items())))
+        with _lock:
+            # Only this portfolio's entries go stale; everyone else's stay warm.
+            if _versions.get(path) != version:
+                for stale in [k for k in _entries if k[0] == path]: del _entries[stale]
+                _versions[path] = version
+            if key in _entries:
+                _entries.move_to_end(key)
+                _stats['hits'] += 1
+                return _detach(_entries[key])
+            _stats['misses'] += 1
+        value = fn(*args, **kwargs)
+        with _lock:
+            if _versions.get(path) == version:
+                _entries[key] = value
+                while len(_entries) > MAX_ENTRIES:
+                    _entries.popitem(last=False)
+                    _stats['evictions'] += 1
+        return _detach(value)
+    return wrapper
+
+def clear():
+    with _lock:
+        _entries.clear()
+        _versions.clear()
+
+def stats():
+    with _lock: return dict(_stats, entries=len(_entries))
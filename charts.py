@@ -0,0 +1,58 @@
+import plotly.graph_objects as go
+import analytics
+import cache
+import ledger
+import profiling
+
+# --- FIGURES ---
+def equity_figure(chart_df):
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=chart_df['date'], y=chart_df['Equity'], mode='lines+markers', fill='tozeroy', line=dict(color='#00CC96', width=3)))
+    fig.add_hline(y=0, line_dash="dot", line_color="red")
+    return fig
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+def heatmap_figure(grid, resolution="day"):
+    if resolution == "day":
+        xaxis = dict(tickformat='%b %d')
+        yaxis = dict(tickmode='array', tickvals=[0,1,2,3,4,5,6], ticktext=['Mon','Tue','Wed','Thu','Fri','Sat','Sun'])
+        hover = '%{x}<br>%{z} mins<extra></extra>'
+    elif resolution == "week":
+        xaxis = dict(title='Week', dtick=4)
+        yaxis = dict(dtick=1)
+        hover = '%{y} W%{x}<br>%{z} mins<extra></extra>'
+    else:
+        xaxis = dict(tickmode='array', tickvals=list(range(1, 13)), ticktext=MONTHS)
+        yaxis = dict(dtick=1)
+        hover = '%{x}/%{y}<br>%{z} mins<extra></extra>'
+    fig_hm = go.Figure(data=go.Heatmap(
+        x=grid['x'], y=grid['y'], z=grid['duration'],
+        colorscale=[[0, '#ebedf0'], [0.01, '#9be9a8'], [1.0, '#216e39']],
+        showscale=False, xgap=3, ygap=3, hoverongaps=False, hovertemplate=hover
+    ))
+    fig_hm.update_layout(
+        height=200 if resolution == "day" else max(160, 40 * grid['y'].nunique() + 60), margin=dict(l=20, r=20, t=20, b=20),
+        xaxis=dict(showgrid=False, zeroline=False, **xaxis),
+        yaxis=dict(showgrid=False, zeroline=False, autorange="reversed", **yaxis),
+        plot_bgcolor='rgba(0,0,0,0)', yaxis_scaleanchor="x"
+    )
+    return fig_hm
+
+# --- CACHED FIGURES ---
+# Built from DB-side aggregates and cached per range on the ledger version,
+# so switching ranges or rerunning without a write costs a dict lookup.
+@profiling.timed
+@cache.cached
+def equity_for(today):
+    daily = ledger.get_daily_summary()
+    if daily.empty: return None
+    return equity_figure(analytics.equity_curve(daily, today, ledger.BASE_RENT))
+
+@profiling.timed
+@cache.cached
+def heatmap_for(range_name):
+    heatmap = ledger.get_heatmap(range_name)
+    if heatmap is None: return None
+    grid, resolution = heatmap
+    return heatmap_figure(grid, resolution)
@@ -0,0 +1,320 @@
+import itertools
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import profiling
+
+# --- CONFIGURATION ---
+DB_FILE = "portfolio.db"
+BUSY_TIMEOUT_MS = 5000
+LOCK_RETRIES = 6
+LOCK_BACKOFF = 0.05      # seconds, doubled on each retry
+STATEMENT_CACHE = 256    # prepared statements kept warm per connection
+MAX_IDLE = 8             # pooled connections kept open per database file
+MAX_POOLED = 32          # ... and across all files; the least recently used file's go first
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16384",      # 16 MB page cache
+    "PRAGMA mmap_size=268435456",    # 256 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+)
+
+# --- CONNECTION POOL ---
+# Streamlit runs every rerun on a fresh script thread, so a plain thread-local
+# would reconnect each time. Each thread instead leases a connection from the
+# pool and the lease hands it back when the thread's locals are torn down.
+# A server with many portfolios keeps at most MAX_POOLED idle connections:
+# past that, the least recently used file's pool is closed with its sentinel.
+_idle = OrderedDict()        # database file -> idle connections, least recently used file first
+_idle_lock = threading.Lock()
+_local = threading.local()
+_sentinels = {}              # database file -> (serial, connection)
+_sentinel_lock = threading.Lock()
+_sentinel_serials = itertools.count()
+write_counts = Counter()     # commits made in this process, per database file
+
+def connect(path):
+    # A connection of its own, outside the pool, with the pragmas applied.
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None,
+                           check_same_thread=False, cached_statements=STATEMENT_CACHE)
+    for pragma in PRAGMAS: conn.execute(pragma)
+    return conn
+
+def _evict_idle():
+    # Called with _idle_lock held. Returns the connections to close.
+    closing = []
+    while len(_idle) > 1 and sum(len(pool) for pool in _idle.values()) > MAX_POOLED:
+        path, pool = _idle.popitem(last=False)
+        closing += pool
+        with _sentinel_lock:
+            if path in _sentinels: closing.append(_sentinels.pop(path)[1])
+    return closing
+
+def _release(path, conn):
+    try:
+        if conn.in_transaction: conn.rollback()
+        with _idle_lock:
+            pool = _idle.setdefault(path, [])
+            _idle.move_to_end(path)
+            if len(pool) < MAX_IDLE:
+                pool.append(conn)
+                closing = _evict_idle()
+            else: closing = [conn]
+        for old in closing: old.close()
+    except Exception:
+        pass
+
+class _Lease:
+    def __init__(self, path, conn): self.path, self.conn = path, conn
+    def __del__(self): _release(self.path, self.conn)
+
+def get_conn():
+    path = current_file()
+    leases = getattr(_local, 'leases', None)
+    if leases is None: leases = _local.leases = {}
+    lease = leases.get(path)
+    if lease is None:
+        with _idle_lock:
+            pool = _idle.get(path)
+            conn = pool.pop() if pool else None
+            if pool is not None: _idle.move_to_end(path)
+        lease = leases[path] = _Lease(path, conn or connect(path))
+    return lease.conn
+
+def close_all():
+    leases = getattr(_local, 'leases', None) or {}
+    for lease in leases.values(): lease.conn.close()
+    leases.clear()
+    with _idle_lock:
+        for pool in _idle.values():
+            for conn in pool: conn.close()
+        _idle.clear()
+    with _sentinel_lock:
+        for _, conn in _sentinels.values(): conn.close()
+        _sentinels.clear()
+
+def data_version(path=None):
+    # PRAGMA data_version only changes when *another* connection commits, and
+    # values are only comparable on one connection, so every caller shares a
+    # read-only sentinel that never writes itself. The sentinel may be
+    # evicted with its pool; the version carries the serial of the one that
+    # read it, so a reopened sentinel never repeats an old version.
+    path = path or current_file()
+    with _sentinel_lock:
+        if path not in _sentinels: _sentinels[path] = (next(_sentinel_serials), connect(path))
+        serial, conn = _sentinels[path]
+        return serial, conn.execute("PRAGMA data_version").fetchone()[0]
+
+# --- PORTFOLIOS ---
+# Each portfolio is its own database file: the default one is DB_FILE and the
+# rest live in PORTFOLIO_DIR. Connections, the read cache, the writer thread
+# and backups are all keyed by file, so a heavy ledger only ever costs its
+# own user. The active portfolio is per thread, i.e. per Streamlit session
+# rerun; code that never picks one keeps using DB_FILE.
+PORTFOLIO_DIR = "portfolios"
+DEFAULT_PORTFOLIO = "default"
+_PORTFOLIO_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9_-]{0,63}")
+
+def portfolio_file(name):
+    if name in (None, DEFAULT_PORTFOLIO): return DB_FILE
+    if not _PORTFOLIO_NAME.fullmatch(name):
+        raise ValueError(f"Invalid portfolio name {name!r}: use up to 64 letters, digits, '-' or '_'.")
+    return os.path.join(PORTFOLIO_DIR, f"{name}.db")
+
+def use_portfolio(name):
+    path = portfolio_file(name)
+    if path != DB_FILE: os.makedirs(PORTFOLIO_DIR, exist_ok=True)
+    _local.file = path
+    return path
+
+def current_file():
+    return getattr(_local, 'file', None) or DB_FILE
+
+def list_portfolios():
+    names = [DEFAULT_PORTFOLIO]
+    if os.path.isdir(PORTFOLIO_DIR):
+        names += sorted(f[:-3] for f in os.listdir(PORTFOLIO_DIR) if f.endswith(".db") and _PORTFOLIO_NAME.fullmatch(f[:-3]))
+    return names
+
+# --- LOCK RECOVERY ---
+def _is_locked(err):
+    msg = str(err).lower()
+    return 'locked' in msg or 'busy' in msg
+
+def retry_locked(fn, *args, **kwargs):
+    for attempt in range(LOCK_RETRIES):
+        try:
+            return fn(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            if not _is_locked(e) or attempt == LOCK_RETRIES - 1: raise
+            time.sleep(LOCK_BACKOFF * 2 ** attempt)
+
+# --- QUERY HELPERS ---
+def query(sql, params=()):
+    rows = retry_locked(lambda: get_conn().execute(sql, params).fetchall())
+    profiling.add_rows(len(rows))
+    return rows
+
+def query_one(sql, params=()):
+    row = retry_locked(lambda: get_conn().execute(sql, params).fetchone())
+    profiling.add_rows(row is not None)
+    return row
+
+def read_sql(sql, params=()):
+    # pandas is imported on first use so CLI tools that never build a frame
+    # (report.py) start without it.
+    import pandas as pd
+    df = retry_locked(pd.read_sql, sql, get_conn(), params=params)
+    profiling.add_rows(len(df))
+    return df
+
+@contextmanager
+def transaction():
+    # BEGIN IMMEDIATE takes the write lock up front, so contention surfaces
+    # here (where it is safe to retry) rather than halfway through the body.
+    conn = get_conn()
+    retry_locked(conn.execute, "BEGIN IMMEDIATE")
+    try:
+        yield conn.cursor()
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    write_counts[current_file()] += 1
+
+# --- TIME COLUMNS ---
+# Next to the ISO text, logs carry `ts`, the wall-clock timestamp as integer
+# microseconds since 1970-01-01 (local time, no zone conversion), and `day`,
+# the day number ts // DAY_US. Readers filter, sort and group on those and
+# never parse the text.
+DAY_US = 86_400_000_000
+EPOCH = datetime(1970, 1, 1)
+BACKFILL_ROWS = 100_000
+LOG_INSERT = "INSERT INTO logs (timestamp, ts, day, project, duration, points, notes) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+def epoch_us(when):
+    return (when - EPOCH) // timedelta(microseconds=1)
+
+def from_epoch_us(ts):
+    return EPOCH + timedelta(microseconds=ts)
+
+def day_number(day):
+    return (day - EPOCH.date()).days
+
+def from_day_number(n):
+    return EPOCH.date() + timedelta(days=n)
+
+def day_bounds(day):
+    # A calendar day as the half-open ts range [day, day + 1).
+    start = day_number(day) * DAY_US
+    return start, start + DAY_US
+
+def log_row(when, project, duration, points, notes):
+    ts = epoch_us(when)
+    return (when.isoformat(), ts, ts // DAY_US, project, duration, points, notes)
+
+def _backfill_time_columns(c):
+    # Fills ts/day for rows written before the columns existed (or by a writer
+    # that only knows the text column), parsing each timestamp exactly once.
+    import pandas as pd
+    while True:
+        c.execute("SELECT id, timestamp FROM logs WHERE ts IS NULL LIMIT ?", (BACKFILL_ROWS,))
+        rows = c.fetchall()
+        if not rows: return
+        ids = [r[0] for r in rows]
+        ts = pd.to_datetime([r[1] for r in rows], format='ISO8601').to_numpy(dtype='datetime64[us]').astype('int64').tolist()
+        c.executemany("UPDATE logs SET ts = ?, day = ? WHERE id = ?", ((t, t // DAY_US, i) for t, i in zip(ts, ids)))
+
+def migrate_time_columns(c):
+    c.execute("PRAGMA table_info(logs)")
+    columns = {row[1] for row in c.fetchall()}
+    if 'ts' not in columns: c.execute("ALTER TABLE logs ADD COLUMN ts INTEGER")
+    if 'day' not in columns: c.execute("ALTER TABLE logs ADD COLUMN day INTEGER")
+    # The text indexes are superseded by the ts ones created in create_tables.
+    for name in ("idx_logs_timestamp", "idx_logs_project_timestamp"): c.execute(f"DROP INDEX IF EXISTS {name}")
+    c.execute("SELECT sql FROM sqlite_master WHERE name = 'idx_logs_system_events'")
+    row = c.fetchone()
+    if row and 'timestamp' in row[0]: c.execute("DROP INDEX idx_logs_system_events")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_logs_ts ON logs(ts)")
+    _backfill_time_columns(c)
+
+# --- SCHEMA ---
+# Every table init_schema creates, here and in rollup.py / kpis.py.
+SCHEMA_TABLES = ("logs", "tasks", "bounties", "archived_months", "daily_summary", "archived_summary",
+                 "project_summary", "archived_project_summary", "social_ema", "kpis", "kpi_state")
+
+def init_schema():
+    import rollup
+    with transaction() as c:
+        create_tables(c)
+        if rollup.create_table(c): rollup.rebuild(c)
+
+def needs_migration():
+    # Read-only check for work init_schema would do: a missing table, or logs
+    # without filled ts/day columns. Readers call it so they only take the
+    # write lock on a ledger an older version left behind.
+    tables = {row[0] for row in query("SELECT name FROM sqlite_master WHERE type='table'")}
+    if not tables.issuperset(SCHEMA_TABLES): return True
+    if not {'ts', 'day'} <= {row[1] for row in query("PRAGMA table_info(logs)")}: return True
+    return query_one("SELECT 1 FROM logs WHERE ts IS NULL LIMIT 1") is not None
+
+def create_tables(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS logs 
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  timestamp TEXT, 
+                  project TEXT, 
+                  duration INTEGER, 
+                  points INTEGER,
+                  notes TEXT,
+                  ts INTEGER,
+                  day INTEGER)''')
+    migrate_time_columns(c)
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS tasks 
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  name TEXT UNIQUE, 
+                  tier TEXT, 
+                  active BOOLEAN)''')
+    
+    c.execute('''CREATE TABLE IF NOT EXISTS bounties 
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  name TEXT UNIQUE, 
+                  value INTEGER, 
+                  status TEXT)''') 
+
+    c.execute("CREATE INDEX IF NOT EXISTS idx_logs_ts ON logs(ts)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_logs_project_ts ON logs(project, ts)")
+    # (project, rowid): serves the ledger's per-asset keyset pages without a sort.
+    c.execute("CREATE INDEX IF NOT EXISTS idx_logs_project ON logs(project)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_logs_system_events ON logs(notes, ts) WHERE project='System'")
+
+    # Which months live in the cold tier and in which file (see archive.py).
+    c.execute('''CREATE TABLE IF NOT EXISTS archived_months
+                 (month TEXT PRIMARY KEY,
+                  file TEXT,
+                  version INTEGER,
+                  rows INTEGER,
+                  first_ts INTEGER,
+                  last_ts INTEGER,
+                  archived TEXT)''')
+    
+    c.execute("SELECT count(*) FROM tasks")
+    if c.fetchone()[0] == 0:
+        defaults = [
+            ("News App", "Core"),
+            ("Trading Algos", "Core"),
+            ("Agentic AI", "Deep Work"),
+            ("Adversarial DL", "Deep Work"),
+            ("Academics", "Rent"),
+            ("Volleyball", "Rent"),
+            ("Social Life", "Social") 
+        ]
+        c.executemany("INSERT INTO tasks (name, tier, active) VALUES (?, ?, 1)", defaults)
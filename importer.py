@@ -0,0 +1,138 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+import archive
+import db
+import rollup
+import scoring
+
+# --- BULK SESSION IMPORT ---
+# Streams a CSV or JSONL file of sessions (timestamp, project, duration and
+# optionally tier, notes, sleep_hours, social_subtype), scores each chunk with
+# the log_work rules against what is already on the ledger, and writes it with
+# executemany. Progress is stored alongside the rows, so a failed or
+# interrupted import resumes from its last committed checkpoint.
+BATCH_SIZE = 50_000
+
+def _create_progress_table(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS import_progress
+                 (source TEXT PRIMARY KEY,
+                  rows_done INTEGER,
+                  updated TEXT)''')
+
+def _read_chunks(path, fmt, batch_size):
+    if fmt == "jsonl": return pd.read_json(path, lines=True, chunksize=batch_size, dtype=False)
+    return pd.read_csv(path, chunksize=batch_size, dtype={'notes': str, 'social_subtype': str, 'tier': str})
+
+def _score_chunk(c, chunk, tiers):
+    chunk = chunk.copy()
+    chunk['timestamp'] = pd.to_datetime(chunk['timestamp'], format='ISO8601')
+    chunk = chunk.sort_values('timestamp', kind='stable', ignore_index=True)
+    if 'tier' not in chunk: chunk['tier'] = None
+    chunk['tier'] = chunk['tier'].fillna(chunk['project'].map(tiers))
+    unknown = chunk.loc[chunk['tier'].isna(), 'project'].unique()
+    if len(unknown): raise ValueError(f"Unknown assets (IPO them first or add a tier column): {', '.join(map(str, unknown))}")
+
+    first_day = chunk['timestamp'].iloc[0].normalize()
+    end_day = chunk['timestamp'].iloc[-1].normalize() + pd.Timedelta(days=1)
+    first_ts, end_ts = db.epoch_us(first_day), db.epoch_us(end_day)
+    # A backfill into an archived month scores against its partition too.
+    c.execute("SELECT ts, project, duration, points FROM logs WHERE ts >= ? AND ts < ?", (first_ts, end_ts))
+    history = pd.DataFrame(c.fetchall(), columns=['ts', 'project', 'duration', 'points'])
+    cold = archive.read_cold(first_ts, end_ts, ('ts', 'project', 'duration', 'points'))
+    if cold is not None:
+        history = pd.concat([cold.astype({'project': object}), history], ignore_index=True).sort_values('ts', kind='stable')
+    history.insert(0, 'timestamp', pd.to_datetime(history.pop('ts').astype('int64'), unit='us'))
+
+    exam_ts = db.epoch_us(first_day - scoring.EXAM_WINDOW)
+    c.execute("SELECT ts FROM logs WHERE project='System' AND notes='Exam Mode Activated' "
+              "AND ts >= ? AND ts < ?", (exam_ts, end_ts))
+    stamps = [r[0] for r in c.fetchall()]
+    cold = archive.read_cold(exam_ts, end_ts, ('ts', 'project', 'notes'))
+    if cold is not None:
+        stamps += cold.loc[(cold['project'] == 'System') & (cold['notes'] == 'Exam Mode Activated'), 'ts'].tolist()
+    activations = pd.to_datetime(sorted(stamps), unit='us')
+    return scoring.score_batch(chunk, history=history, exam_activations=activations)
+
+def import_sessions(path, fmt=None, batch_size=BATCH_SIZE, commit_every=None, restart=False, progress=print):
+    fmt = fmt or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+    source = os.path.abspath(path)
+    db.init_schema()
+    with db.transaction() as c:
+        _create_progress_table(c)
+        if restart: c.execute("DELETE FROM import_progress WHERE source=?", (source,))
+        c.execute("SELECT rows_done FROM import_progress WHERE source=?", (source,))
+        row = c.fetchone()
+        c.execute("SELECT name, tier FROM tasks WHERE active=1")
+        tiers = dict(c.fetchall())
+    rows_done = row[0] if row else 0
+    if rows_done: progress(f"↪️ Resuming {path} after {rows_done} rows.")
+
+    seen = 0
+    last_ts = None
+    started = time.time()
+    conn = db.get_conn()
+    db.retry_locked(conn.execute, "BEGIN IMMEDIATE")
+    try:
+        c = conn.cursor()
+        pending = 0
+        for chunk in _read_chunks(path, fmt, batch_size):
+            skip = min(len(chunk), max(rows_done - seen, 0))
+            seen += len(chunk)
+            chunk = chunk.iloc[skip:]
+            # Cut at each --commit-every boundary, so checkpoints land every N
+            # rows whatever the batch size.
+            while not chunk.empty:
+                take = min(len(chunk), commit_every - pending) if commit_every else len(chunk)
+                part, chunk = chunk.iloc[:take], chunk.iloc[take:]
+                scored = _score_chunk(c, part, tiers)
+                if last_ts is not None and scored['timestamp'].iloc[0] < last_ts:
+                    raise ValueError(f"{path} is not sorted by timestamp (row ~{seen - len(chunk) - len(part) + 1} goes back in time).")
+                last_ts = scored['timestamp'].iloc[-1]
+
+                stamps = scored['timestamp'].to_numpy(dtype='datetime64[us]')
+                timestamps = np.datetime_as_string(stamps, unit='us')
+                ts = stamps.astype(np.int64)
+                c.executemany(db.LOG_INSERT,
+                              zip(timestamps.tolist(), ts.tolist(), (ts // db.DAY_US).tolist(), scored['project'].tolist(),
+                                  scored['duration'].astype(int).tolist(), scored['points'].tolist(), scored['notes'].tolist()))
+                rollup.refresh_range(c, timestamps[0], timestamps[-1])
+                rows_done = seen - len(chunk)
+                c.execute("INSERT OR REPLACE INTO import_progress (source, rows_done, updated) VALUES (?, ?, datetime('now'))",
+                          (source, rows_done))
+                pending += len(part)
+                progress(f"  {rows_done:>10,} rows  ({rows_done / max(time.time() - started, 1e-9):,.0f} rows/s)")
+
+                if commit_every and pending >= commit_every:
+                    conn.commit()
+                    db.retry_locked(conn.execute, "BEGIN IMMEDIATE")
+                    pending = 0
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        progress(f"❌ Import stopped; {path} will resume from the last committed checkpoint.")
+        raise
+    db.write_counts[db.current_file()] += 1
+    progress(f"✅ Imported {path}: {rows_done:,} rows in {time.time() - started:.2f}s.")
+    return rows_done
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-import scored sessions from CSV or JSONL.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--commit-every", type=int, help="commit a checkpoint every N rows (default: one transaction)")
+    parser.add_argument("--restart", action="store_true", help="ignore saved progress for this file")
+    parser.add_argument("--db", default=db.DB_FILE)
+    parser.add_argument("--portfolio", help="portfolio name (overrides --db)")
+    args = parser.parse_args()
+    db.DB_FILE = args.db
+    if args.portfolio: db.use_portfolio(args.portfolio)
+    try:
+        import_sessions(args.path, args.format, args.batch_size, args.commit_every, args.restart)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
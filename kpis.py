@@ -0,0 +1,133 @@
+import argparse
+import sys
+from datetime import date, timedelta
+import db
+
+# --- ROLLING KPI STORE ---
+# Every rolling-window number the dashboard and report show is defined once
+# below and materialized in `kpis` as (span, project, name, value) rows,
+# project '' being the whole portfolio. Values come from window functions
+# over the day rollups (daily_summary, project_summary), so archived months
+# count too. The rollup refreshes the windows holding a day whenever it
+# rewrites that day; a new KPI is one more entry here and a rebuild, and
+# readers pick it up by name at no extra cost.
+WINDOWS = {"week": None, "7d": 7, "30d": 30, "90d": 90}    # None: Monday of this week to today
+
+# name -> aggregate over the window's daily_summary rows (d).
+TOTALS = {
+    'points': "SUM(d.total_points)",
+    'duration': "SUM(d.total_duration)",
+    'social_points': "SUM(d.social_points)",
+    'deep_work_tokens': "SUM(d.deep_work_tokens)",
+    'core_days': "SUM(d.core_met)",
+    'active_days': "COUNT(d.day)",
+    'sessions': "(SELECT SUM(p.sessions) FROM project_summary p WHERE p.day >= w.first_day AND p.day <= w.last_day)",
+}
+
+# name -> expression per project over the window's project_summary rows (p);
+# the OVER clauses compare the projects within one window.
+PROJECTS = {
+    'sessions': "SUM(p.sessions)",
+    'duration': "SUM(p.duration)",
+    'points': "SUM(p.points)",
+    'active_days': "COUNT(p.day)",
+    'duration_rank': "RANK() OVER (PARTITION BY w.name ORDER BY SUM(p.duration) DESC)",
+    'duration_share': "SUM(p.duration) * 1.0 / NULLIF(SUM(SUM(p.duration)) OVER (PARTITION BY w.name), 0)",
+}
+
+def create_table(c):
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='kpis'")
+    exists = c.fetchone() is not None
+    c.execute('''CREATE TABLE IF NOT EXISTS kpis
+                 (span TEXT,
+                  project TEXT,
+                  name TEXT,
+                  value REAL,
+                  PRIMARY KEY (span, project, name))''')
+    c.execute('''CREATE TABLE IF NOT EXISTS kpi_state
+                 (id INTEGER PRIMARY KEY CHECK (id = 1),
+                  as_of TEXT)''')
+    return not exists
+
+def bounds(span, today):
+    # (first_day, last_day) ISO days of a window ending today.
+    days = WINDOWS[span]
+    first = today - timedelta(days=today.weekday()) if days is None else today - timedelta(days=days - 1)
+    return first.isoformat(), today.isoformat()
+
+def _select(spans, today):
+    totals = ", ".join(f"COALESCE({expr}, 0) AS {name}" for name, expr in TOTALS.items())
+    projects = ", ".join(f"{expr} AS {name}" for name, expr in PROJECTS.items())
+    rows = [f"SELECT span, '', '{name}', {name} FROM totals" for name in TOTALS] + \
+           [f"SELECT span, project, '{name}', {name} FROM projects" for name in PROJECTS]
+    sql = f'''WITH windows (name, first_day, last_day) AS (VALUES {", ".join(["(?, ?, ?)"] * len(spans))}),
+                   totals AS (SELECT w.name AS span, {totals} FROM windows w
+                              LEFT JOIN daily_summary d ON d.day >= w.first_day AND d.day <= w.last_day
+                              GROUP BY w.name),
+                   projects AS (SELECT w.name AS span, p.project, {projects} FROM windows w
+                                JOIN project_summary p ON p.day >= w.first_day AND p.day <= w.last_day
+                                GROUP BY w.name, p.project)
+              {" UNION ALL ".join(rows)}'''
+    return sql, [v for span in spans for v in (span,) + bounds(span, today)]
+
+def _as_of(c):
+    c.execute("SELECT as_of FROM kpi_state WHERE id = 1")
+    row = c.fetchone()
+    return row[0] if row else None
+
+def refresh(c, spans=WINDOWS, today=None):
+    today = today or date.today()
+    spans = list(spans)
+    sql, params = _select(spans, today)
+    c.execute(f"DELETE FROM kpis WHERE span IN ({', '.join('?' * len(spans))})", spans)
+    c.execute(f"INSERT INTO kpis (span, project, name, value) {sql}", params)
+    c.execute("INSERT OR REPLACE INTO kpi_state (id, as_of) VALUES (1, ?)", (today.isoformat(),))
+
+def refresh_day(c, day):
+    # After the rollup rewrote `day`: only the windows holding it change,
+    # unless the date rolled over since the last refresh and they all moved.
+    today = date.today()
+    if _as_of(c) != today.isoformat(): return refresh(c, today=today)
+    spans = [span for span in WINDOWS if bounds(span, today)[0] <= day <= today.isoformat()]
+    if spans: refresh(c, spans, today)
+
+def read(c, today=None):
+    # {(span, project, name): value}. If nothing was written yet today the
+    # stored windows end yesterday; those are computed on the spot instead
+    # and stored by the next write.
+    today = today or date.today()
+    if _as_of(c) == today.isoformat(): c.execute("SELECT span, project, name, value FROM kpis")
+    else: c.execute(*_select(list(WINDOWS), today))
+    return {(span, project, name): value for span, project, name, value in c.fetchall()}
+
+def value(values, span, name, project=''):
+    return values.get((span, project, name)) or 0
+
+def top_project(values, span):
+    # The window's most-worked project (ties go to the first by name).
+    ranked = sorted(p for (s, p, n), v in values.items() if s == span and p and n == 'duration_rank' and v == 1)
+    return ranked[0] if ranked else None
+
+def table(values, names=TOTALS):
+    # One row per window, one column per portfolio-wide KPI.
+    import pandas as pd
+    return pd.DataFrame([[value(values, span, name) for name in names] for span in WINDOWS],
+                        index=list(WINDOWS), columns=list(names))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show or rebuild the rolling-window KPI store.")
+    parser.add_argument("command", choices=["show", "rebuild"])
+    parser.add_argument("--db", default=db.DB_FILE)
+    parser.add_argument("--portfolio", help="portfolio name (overrides --db)")
+    args = parser.parse_args()
+    db.DB_FILE = args.db
+    if args.portfolio: db.use_portfolio(args.portfolio)
+    try: db.init_schema()
+    except db.sqlite3.OperationalError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if args.command == "rebuild":
+        with db.transaction() as c: refresh(c)
+        print(f"✅ KPIs rebuilt: {db.query_one('SELECT COUNT(*) FROM kpis')[0]} values.")
+    c = db.get_conn().cursor()
+    print(table(read(c)).to_string())
@@ -0,0 +1,352 @@
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, date, timedelta
+import pandas as pd
+import analytics
+import archive
+import db
+import backup
+import cache
+import kpis
+import profiling
+import rollup
+import scoring
+import writer
+
+# --- CONFIGURATION ---
+WEEKLY_TOKEN_CAP = 6  
+BASE_RENT = 30 
+SOCIAL_EMA_TARGET = 8.0 
+
+# --- DATABASE ENGINE ---
+_schema_ready = set()
+
+@profiling.timed
+def init_db():
+    # Schema setup runs once per process and DB file: re-running the DDL each
+    # rerun would take the write lock and count as a ledger write.
+    if db.current_file() not in _schema_ready:
+        db.init_schema()
+        _schema_ready.add(db.current_file())
+    backup.ensure_daily_backup()
+
+@profiling.timed
+@cache.cached
+def get_active_tasks():
+    return db.read_sql("SELECT name, tier FROM tasks WHERE active=1")
+
+@profiling.timed
+def manage_task(action, name=None, tier=None):
+    # Returns False when an asset of that name already exists.
+    def command(c):
+        if action == "add":
+            try:
+                c.execute("INSERT INTO tasks (name, tier, active) VALUES (?, ?, 1)", (name, tier))
+            except sqlite3.IntegrityError:
+                return False
+            rollup.refresh_project(c, name)
+        elif action == "delete":
+            c.execute("DELETE FROM tasks WHERE name=?", (name,))
+            rollup.refresh_project(c, name)
+        return True
+    return writer.call(command)
+
+# --- NEEDLE MOVER LOGIC ---
+@profiling.timed
+@cache.cached
+def check_needle_status(target_date=None):
+    if target_date is None: target_date = date.today()
+    try:
+        row = db.query_one("SELECT 1 FROM logs WHERE project='System' AND notes='Needle Moved' "
+                           "AND ts >= ? AND ts < ? LIMIT 1", db.day_bounds(target_date))
+    except: return False
+    return row is not None
+
+def _append_log(c, row):
+    c.execute(db.LOG_INSERT, row)
+    rollup.refresh_day(c, db.from_day_number(row[2]).isoformat())
+
+@profiling.timed
+def set_needle_status(state):
+    if state: writer.call(_append_log, db.log_row(datetime.now(), "System", 0, 0, "Needle Moved"))
+    return state
+
+# --- BOUNTY SYSTEM ---
+@profiling.timed
+def manage_bounty(action, name=None, value=0):
+    # "add" returns False for a duplicate name; "claim" returns the points paid.
+    def command(c):
+        if action == "add":
+            try:
+                c.execute("INSERT INTO bounties (name, value, status) VALUES (?, ?, 'Open')", (name, value))
+            except sqlite3.IntegrityError:
+                return False
+        elif action == "claim":
+            c.execute("UPDATE bounties SET status='Claimed' WHERE name=?", (name,))
+            c.execute("SELECT value FROM bounties WHERE name=?", (name,))
+            val = c.fetchone()[0]
+            _append_log(c, db.log_row(datetime.now(), "Bounty Hunt", 0, val, f"CLAIMED: {name}"))
+            return val
+        elif action == "delete":
+            c.execute("DELETE FROM bounties WHERE name=?", (name,))
+        return True
+    return writer.call(command)
+
+@profiling.timed
+@cache.cached
+def get_open_bounties():
+    return db.read_sql("SELECT name, value FROM bounties WHERE status='Open'")
+
+# --- BOSS BATTLE LOGIC ---
+@profiling.timed
+@cache.cached
+def last_exam_activation():
+    try:
+        row = db.query_one("SELECT MAX(ts) FROM logs WHERE project='System' AND notes='Exam Mode Activated'")
+    except: return None
+    if row is None or row[0] is None: return None
+    return db.from_epoch_us(row[0])
+
+@profiling.timed
+def check_exam_mode():
+    last_activation = last_exam_activation()
+    if last_activation is None: return False, None
+    if datetime.now() < (last_activation + timedelta(hours=72)):
+        return True, last_activation + timedelta(hours=72)
+    return False, None
+
+@profiling.timed
+def activate_exam_mode():
+    writer.call(_append_log, db.log_row(datetime.now(), "System", 0, -50, "Exam Mode Activated"))
+
+def _undo_last(c):
+    c.execute("SELECT project, points, day FROM logs ORDER BY id DESC LIMIT 1")
+    last_row = c.fetchone()
+    if last_row:
+        c.execute("DELETE FROM logs WHERE id = (SELECT MAX(id) FROM logs)")
+        rollup.refresh_day(c, db.from_day_number(last_row[2]).isoformat())
+    return last_row
+
+@profiling.timed
+def undo_last_log():
+    last_row = writer.call(_undo_last)
+    # (project, points) of the reverted row, or None if the ledger was empty.
+    return last_row[:2] if last_row else None
+
+# --- TRANSACTION LEDGER ---
+# Keyset pages: each page is one `id < cursor ORDER BY id DESC LIMIT n` query,
+# so browsing deep into history never loads or sorts the whole table.
+PAGE_SIZE = 25
+
+@profiling.timed
+@cache.cached
+def get_ledger_page(before_id=None, limit=PAGE_SIZE, project=None, tier=None, first_day=None, last_day=None, notes=None):
+    # Returns (rows, has_more); pass the last row's id as before_id for the next page.
+    where, params = [], []
+    if before_id is not None: where.append("id < ?"); params.append(before_id)
+    if project: where.append("project = ?"); params.append(project)
+    if tier: where.append("project IN (SELECT name FROM tasks WHERE tier = ? AND active = 1)"); params.append(tier)
+    if first_day: where.append("ts >= ?"); params.append(db.day_bounds(first_day)[0])
+    if last_day: where.append("ts < ?"); params.append(db.day_bounds(last_day)[1])
+    if notes:
+        where.append("notes LIKE ? ESCAPE '\\'")
+        params.append("%" + notes.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+    sql = "SELECT id, ts, project, duration, points, notes FROM logs"
+    if where: sql += " WHERE " + " AND ".join(where)
+    rows = db.read_sql(sql + " ORDER BY id DESC LIMIT ?", tuple(params) + (limit + 1,))
+    # Archived rows page in by id like live ones. They are usually all older,
+    # but a late row joins its archived month with a newer id, so partitions
+    # holding ids above a full page's last one are read too.
+    floor = int(rows['id'].iloc[-1]) if len(rows) > limit else None
+    cold = _cold_page(before_id, floor, limit + 1, project, tier, first_day, last_day, notes)
+    if cold: rows = pd.concat([rows] + cold, ignore_index=True).sort_values('id', ascending=False).head(limit + 1)
+    rows.insert(1, 'timestamp', pd.to_datetime(rows.pop('ts').astype('int64'), unit='us'))
+    return rows.head(limit), len(rows) > limit
+
+def _cold_page(before_id, after_id, wanted, project, tier, first_day, last_day, notes):
+    # Archived rows matching the page's filters with after_id < id < before_id.
+    # Partitions are read newest id first, and only while one could still
+    # hold a row among the `wanted` newest.
+    first_ts = db.day_bounds(first_day)[0] if first_day else None
+    last_ts = db.day_bounds(last_day)[1] if last_day else None
+    candidates = []
+    for _, path in archive.partitions(first_ts, last_ts):
+        low, high = archive.id_range(path)
+        if (before_id is None or low < before_id) and (after_id is None or high > after_id): candidates.append((high, path))
+    if not candidates: return []
+    if tier: names = [row[0] for row in db.query("SELECT name FROM tasks WHERE tier = ? AND active = 1", (tier,))]
+    found, ids = [], []
+    for high, path in sorted(candidates, reverse=True):
+        if len(ids) >= wanted and high < ids[-1]: break
+        month = archive.read_month(path, archive.COLUMNS, first_ts, last_ts)
+        keep = pd.Series(True, index=month.index)
+        if before_id is not None: keep &= month['id'] < before_id
+        if after_id is not None: keep &= month['id'] > after_id
+        if project: keep &= month['project'] == project
+        if tier: keep &= month['project'].isin(names)
+        if notes: keep &= month['notes'].str.contains(notes, case=False, regex=False)
+        month = month[keep].astype({'project': str})
+        found.append(month)
+        ids = sorted(ids + month['id'].tolist(), reverse=True)[:wanted]
+    return found
+
+# --- ANALYTICS ENGINE ---
+@profiling.timed
+@cache.cached
+def get_daily_summary():
+    try: daily = db.read_sql("SELECT * FROM daily_summary ORDER BY day")
+    except: daily = pd.DataFrame(columns=['day', 'total_points', 'total_duration', 'social_points', 'core_met', 'deep_work_tokens'])
+    daily.index = pd.to_datetime(daily.pop('day'))
+    return daily
+
+# Cell buckets computed in SQL from the rollup, keyed by their first day.
+_HEATMAP_BUCKETS = {"day": "day", "week": "date(day, 'weekday 0', '-6 days')", "month": "substr(day, 1, 7) || '-01'"}
+
+@profiling.timed
+@cache.cached
+def get_heatmap(range_name):
+    # (grid, resolution) for one of analytics.HEATMAP_RANGES, or None if empty.
+    today = date.today()
+    days = analytics.HEATMAP_RANGES[range_name]
+    if days is None:
+        first = db.query_one("SELECT MIN(day) FROM daily_summary")[0]
+        if first is None: return None
+        first = date.fromisoformat(first)
+    else: first = today - timedelta(days=days - 1)
+    resolution = analytics.heatmap_resolution(first, today)
+    bucket = _HEATMAP_BUCKETS[resolution]
+    rows = db.read_sql(f"SELECT {bucket} AS bucket, SUM(total_duration) AS duration FROM daily_summary "
+                       "WHERE day >= ? AND day <= ? GROUP BY bucket",
+                       (analytics.heatmap_start(first, resolution).date().isoformat(), today.isoformat()))
+    durations = pd.Series(rows['duration'].to_numpy(), index=pd.to_datetime(rows['bucket']))
+    return analytics.heatmap_grid(durations, first, today, resolution), resolution
+
+@profiling.timed
+@cache.cached
+def get_kpis(today):
+    # The rolling-window KPIs (see kpis.py), keyed (span, project, name).
+    return db.retry_locked(lambda: kpis.read(db.get_conn().cursor(), today))
+
+@profiling.timed
+@cache.cached
+def get_social_ema(today):
+    # Persisted by the rollup and advanced on every write; reading it is O(1).
+    # Errors propagate: a made-up 0 would show (and cache) the rent penalty.
+    return db.retry_locked(lambda: rollup.social_ema(db.get_conn().cursor(), today))
+
+def _rent_for(social_ema):
+    current_rent = BASE_RENT
+    if social_ema < (SOCIAL_EMA_TARGET / 2): current_rent = int(BASE_RENT * 1.5)
+    elif social_ema < SOCIAL_EMA_TARGET: current_rent = int(BASE_RENT * 1.2)
+    return current_rent
+
+@profiling.timed
+def get_analytics():
+    snap = load_snapshot()
+    return snap.tokens, snap.social_ema, snap.rent, snap.ledger
+
+# --- TYPED LEDGER LOADER ---
+# Reads only the columns asked for, in archive's compact dtypes, with ts
+# turned into a `timestamp` column. Notes are left out unless requested:
+# the dashboard only ever shows them a ledger page at a time.
+LOG_COLUMNS = ("id", "ts", "project", "duration", "points")
+
+@profiling.timed
+@cache.cached
+def load_logs(columns=LOG_COLUMNS, first_day=None, last_day=None, archived=False):
+    # Logs on first_day..last_day (either end open if None); archived=True
+    # also reads the archive partitions the range touches.
+    first_ts = db.day_bounds(first_day)[0] if first_day else None
+    last_ts = db.day_bounds(last_day)[1] if last_day else None
+    wanted = tuple(columns) if 'ts' in columns else tuple(columns) + ('ts',)
+    try: logs = (archive.read_logs if archived else archive.read_hot)(first_ts, last_ts, wanted)
+    except: logs = pd.DataFrame(columns=list(wanted))
+    timestamp = pd.to_datetime(logs.pop('ts').astype('int64'), unit='us')
+    if 'ts' in columns: logs.insert(list(columns).index('ts'), 'timestamp', timestamp)
+    else: logs['timestamp'] = timestamp
+    return logs
+
+# --- DASHBOARD SNAPSHOT ---
+# Everything a rerun renders, read and parsed once. Cached on the ledger
+# version, so reruns that wrote nothing reuse it wholesale.
+@dataclass
+class Snapshot:
+    today: pd.DataFrame
+    week: pd.DataFrame
+    tasks: pd.DataFrame
+    daily: pd.DataFrame
+    needle_today: bool
+    needle_yesterday: bool
+    last_exam: datetime
+    kpis: dict
+    tokens: int
+    social_ema: float
+    rent: int
+
+    @property
+    def ledger(self):
+        # The whole live table, read only if someone asks for it.
+        return load_logs()
+
+    @property
+    def exam_mode(self):
+        if self.last_exam is None or datetime.now() >= self.last_exam + timedelta(hours=72): return False, None
+        return True, self.last_exam + timedelta(hours=72)
+
+    @property
+    def core_met(self):
+        # The gatekeeper: a Core asset worked for at least 20 minutes today.
+        core = self.tasks.loc[self.tasks['tier'] == 'Core', 'name']
+        return bool((self.today['project'].isin(core) & (self.today['duration'] >= 20)).any())
+
+    @property
+    def today_alpha(self):
+        return int(self.today['points'].sum()) if self.core_met else 0
+
+@profiling.timed
+@cache.cached
+def load_snapshot():
+    # Reads this week's rows, without notes; the needle and exam flags come
+    # from their own indexed queries. Archived months (see archive.py) are
+    # older than anything here looks at; the charts and the rolling KPIs
+    # come from the day rollups, which still cover them.
+    today = date.today()
+    week = load_logs(first_day=today - timedelta(days=today.weekday()))
+    day_start = pd.Timestamp(today)
+    today_logs = week[(week['timestamp'] >= day_start) & (week['timestamp'] < day_start + timedelta(days=1))]
+    values = get_kpis(today)
+    social_ema = get_social_ema(today)
+    return Snapshot(
+        today=today_logs, week=week, tasks=get_active_tasks(), daily=get_daily_summary(),
+        needle_today=check_needle_status(today), needle_yesterday=check_needle_status(today - timedelta(days=1)),
+        last_exam=last_exam_activation(), kpis=values, tokens=int(kpis.value(values, 'week', 'deep_work_tokens')),
+        social_ema=social_ema,
+        rent=_rent_for(social_ema))
+
+def _log_sessions(c, sessions, is_exam_mode):
+    # Reading the day's rows, scoring and inserting all happen on the writer,
+    # so concurrent callers (and a batch's own sessions) each score against
+    # every row logged before them.
+    earned = []
+    for session in sessions:
+        now = datetime.now()
+        c.execute("SELECT duration, points FROM logs WHERE project=? AND ts >= ? AND ts < ?",
+                  (session.project,) + db.day_bounds(now.date()))
+        project_logs = pd.DataFrame(c.fetchall(), columns=['duration', 'points'])
+        score = scoring.score_session(session, scoring.DayContext.from_logs(project_logs, now.hour, is_exam_mode))
+        _append_log(c, db.log_row(now, session.project, session.duration, score.points, score.notes))
+        earned.append(score.points)
+    return earned
+
+@profiling.timed
+def log_work(project, duration, notes, tier, sleep_hours, social_subtype=None, snapshot=None):
+    is_exam_mode, _ = snapshot.exam_mode if snapshot else check_exam_mode()
+    session = scoring.Session(project, tier, duration, sleep_hours, social_subtype, notes)
+    return writer.call(_log_sessions, [session], is_exam_mode)[0]
+
+@profiling.timed
+def log_work_batch(sessions):
+    # Logs scoring.Session objects in order as one writer command (one
+    # commit); returns the points each one earned.
+    is_exam_mode, _ = check_exam_mode()
+    return writer.call(_log_sessions, list(sessions), is_exam_mode)
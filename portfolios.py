@@ -0,0 +1,88 @@
+import argparse
+import os
+import sys
+import db
+import rollup
+
+# --- PORTFOLIO ADMIN ---
+# Lists and creates portfolios and merges existing single-user DB files into
+# one. A merge copies logs, tasks and bounties in a single transaction,
+# rebuilds the target's rollups and records the source file so running the
+# same merge twice does not duplicate history.
+
+def _create_merged_table(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS merged_sources
+                 (source TEXT PRIMARY KEY,
+                  rows INTEGER,
+                  merged TEXT)''')
+
+def create(name):
+    path = db.use_portfolio(name)
+    db.init_schema()
+    return path
+
+def _columns(c, table):
+    c.execute(f"PRAGMA src.table_info({table})")
+    return {row[1] for row in c.fetchall()}
+
+def merge(src, name, force=False, progress=print):
+    # Returns the number of log rows merged (0 if src was merged before).
+    source = os.path.abspath(src)
+    if not os.path.exists(source): raise ValueError(f"{src} does not exist.")
+    target = create(name)
+    if os.path.abspath(target) == source: raise ValueError(f"{src} is already portfolio '{name}'.")
+
+    conn = db.get_conn()
+    conn.execute("ATTACH DATABASE ? AS src", (source,))
+    try:
+        with db.transaction() as c:
+            _create_merged_table(c)
+            c.execute("SELECT rows FROM merged_sources WHERE source=?", (source,))
+            if c.fetchone() and not force:
+                progress(f"↪️ {src} was already merged into '{name}' (use --force to merge again).")
+                return 0
+            logs = _columns(c, "logs")
+            if not logs: raise ValueError(f"{src} has no logs table.")
+            if _columns(c, "archived_months") and c.execute("SELECT 1 FROM src.archived_months LIMIT 1").fetchone():
+                raise ValueError(f"{src} has archived months; restore them with archive.py before merging.")
+            ts, day = ("ts", "day") if {"ts", "day"} <= logs else ("NULL", "NULL")
+            c.execute(f"INSERT INTO logs (timestamp, ts, day, project, duration, points, notes) "
+                      f"SELECT timestamp, {ts}, {day}, project, duration, points, notes FROM src.logs ORDER BY id")
+            rows = c.rowcount
+            if _columns(c, "tasks"):
+                c.execute("INSERT OR IGNORE INTO tasks (name, tier, active) SELECT name, tier, active FROM src.tasks")
+            if _columns(c, "bounties"):
+                c.execute("INSERT OR IGNORE INTO bounties (name, value, status) SELECT name, value, status FROM src.bounties")
+            db.migrate_time_columns(c)
+            rollup.rebuild(c)
+            c.execute("INSERT OR REPLACE INTO merged_sources (source, rows, merged) VALUES (?, ?, datetime('now'))",
+                      (source, rows))
+    finally:
+        conn.execute("DETACH DATABASE src")
+    progress(f"✅ Merged {rows:,} log rows from {src} into '{name}' ({target}).")
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the portfolios served by one deployment.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    p_create = sub.add_parser("create")
+    p_create.add_argument("name")
+    p_merge = sub.add_parser("merge", help="merge single-user DB files into a portfolio")
+    p_merge.add_argument("sources", nargs="+")
+    p_merge.add_argument("--into", required=True, help="portfolio name (created if missing)")
+    p_merge.add_argument("--force", action="store_true", help="merge a source again even if it was merged before")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "list":
+            for name in db.list_portfolios():
+                path = db.portfolio_file(name)
+                print(f"{name:<24} {path:<40} {os.path.getsize(path) if os.path.exists(path) else 0:>14,} bytes")
+        elif args.command == "create":
+            print(f"✅ Portfolio '{args.name}' ready at {create(args.name)}.")
+        else:
+            for src in args.sources: merge(src, args.into, args.force)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
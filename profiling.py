@@ -0,0 +1,114 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# --- RERUN PROFILING ---
+# A rerun opens a trace; spans inside it (data functions, chart sections)
+# record wall time and the rows their queries returned, nested by call depth.
+# Outside a trace -- CLI tools, benchmarks, the writer thread -- every hook is
+# a single attribute lookup. Finished reruns are appended to a rolling JSONL
+# file and/or folded into a Prometheus textfile, per PORTFOLIO_METRICS
+# ("jsonl", "prom", "both" or "off").
+METRICS_DIR = "metrics"
+METRICS_FORMAT = os.environ.get("PORTFOLIO_METRICS", "jsonl")
+JSONL_FILE = "reruns.jsonl"
+PROM_FILE = "dashboard.prom"
+MAX_BYTES = 5 * 1024 * 1024     # the JSONL file rolls over to .1 past this
+
+_local = threading.local()
+_lock = threading.Lock()
+_totals = {}                    # span name -> [count, seconds, rows], for Prometheus
+_reruns = [0, 0.0, 0]           # count, seconds, rows
+
+def start_rerun():
+    _local.trace = {'started': time.perf_counter(), 'spans': [], 'stack': [], 'rows': 0}
+
+@contextmanager
+def span(name):
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        yield
+        return
+    record = {'name': name, 'depth': len(trace['stack']), 'ms': 0.0, 'rows': 0}
+    trace['spans'].append(record)
+    trace['stack'].append(record)
+    started = time.perf_counter()
+    try: yield
+    finally:
+        record['ms'] = round((time.perf_counter() - started) * 1000, 3)
+        trace['stack'].pop()
+
+def timed(fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if getattr(_local, 'trace', None) is None: return fn(*args, **kwargs)
+        with span(fn.__name__): return fn(*args, **kwargs)
+    return wrapper
+
+def add_rows(n):
+    trace = getattr(_local, 'trace', None)
+    if trace is None: return
+    trace['rows'] += n
+    for record in trace['stack']: record['rows'] += n
+
+def finish_rerun(**labels):
+    # Closes the trace and exports it. Returns the record, or None if no
+    # trace was open.
+    trace = getattr(_local, 'trace', None)
+    if trace is None: return None
+    _local.trace = None
+    record = dict(labels, at=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  total_ms=round((time.perf_counter() - trace['started']) * 1000, 3),
+                  rows=trace['rows'], spans=trace['spans'])
+    if METRICS_FORMAT != "off":
+        try: _export(record)
+        except OSError: pass
+    return record
+
+def _export(record):
+    with _lock:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        if METRICS_FORMAT in ("jsonl", "both"):
+            path = os.path.join(METRICS_DIR, JSONL_FILE)
+            if os.path.exists(path) and os.path.getsize(path) > MAX_BYTES: os.replace(path, path + ".1")
+            with open(path, "a") as f: f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        if METRICS_FORMAT in ("prom", "both"):
+            _reruns[0] += 1
+            _reruns[1] += record['total_ms'] / 1000
+            _reruns[2] += record['rows']
+            for s in record['spans']:
+                totals = _totals.setdefault(s['name'], [0, 0.0, 0])
+                totals[0] += 1
+                totals[1] += s['ms'] / 1000
+                totals[2] += s['rows']
+            _write_prom(record)
+
+def _write_prom(last):
+    # Textfile-collector format, rewritten atomically after every rerun.
+    lines = ["# HELP dashboard_rerun_seconds Wall time of dashboard reruns.",
+             "# TYPE dashboard_rerun_seconds summary",
+             f"dashboard_rerun_seconds_sum {_reruns[1]:.6f}",
+             f"dashboard_rerun_seconds_count {_reruns[0]}",
+             "# HELP dashboard_rerun_last_seconds Wall time of the latest rerun.",
+             "# TYPE dashboard_rerun_last_seconds gauge",
+             f"dashboard_rerun_last_seconds {last['total_ms'] / 1000:.6f}",
+             "# HELP dashboard_rows_read_total Rows returned by dashboard queries.",
+             "# TYPE dashboard_rows_read_total counter",
+             f"dashboard_rows_read_total {_reruns[2]}",
+             "# HELP dashboard_span_seconds Wall time per instrumented span.",
+             "# TYPE dashboard_span_seconds summary"]
+    for name, (count, seconds, _) in sorted(_totals.items()):
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        lines += [f'dashboard_span_seconds_sum{{span="{label}"}} {seconds:.6f}',
+                  f'dashboard_span_seconds_count{{span="{label}"}} {count}']
+    lines += ["# HELP dashboard_span_rows_total Rows returned by queries inside each span.",
+              "# TYPE dashboard_span_rows_total counter"]
+    for name, (_, _, rows) in sorted(_totals.items()):
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        lines.append(f'dashboard_span_rows_total{{span="{label}"}} {rows}')
+    path = os.path.join(METRICS_DIR, PROM_FILE)
+    with open(path + ".tmp", "w") as f: f.write("\n".join(lines) + "\n")
+    os.replace(path + ".tmp", path)
@@ -1,73 +1,282 @@
-import sqlite3
-import pandas as pd
-from datetime import datetime, timedelta
+import argparse
+import io
+import json
+import math
+import multiprocessing
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, date, timedelta
+import db
+import kpis
 
-DB_FILE = "portfolio.db"
+# --- REPORT WINDOW ---
+# The window is pushed into SQL and the notes are streamed from a cursor, so
+# the cost of a report follows its output rather than the size of the ledger.
+WINDOWS = {"week": 7, "month": 30}    # whole days, today included: kpis' 7d and 30d
+CHUNK_ROWS = 2_000
+MAX_CHARS = 24_000
+CHARS_PER_TOKEN = 4
+LINE_OVERHEAD = 24  # "- [YYYY-MM-DD]  (m): \n" around project and notes
+SUMMARY_PROJECTS = 8
 
-def generate_llm_prompt():
-    conn = sqlite3.connect(DB_FILE)
-    try:
-        df = pd.read_sql("SELECT * FROM logs", conn)
-    except:
-        print("No database found.")
-        return
-    conn.close()
-
-    if df.empty:
-        print("No logs found.")
-        return
-
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    
-    # Filter for last 30 days
-    last_30 = df[df['timestamp'] > (datetime.now() - timedelta(days=30))]
-    
-    if last_30.empty:
-        print("No data in last 30 days.")
-        return
-
-    # Calculate Stats
-    total_points = last_30['points'].sum()
-    top_project = last_30.groupby('project')['duration'].sum().idxmax()
-    avg_sleep = 7.0 # Placeholder if you tracked sleep in notes, but we didn't save raw sleep val to DB (Optimization for V3)
-    
-    # Aggregate Notes
-    notes_text = ""
-    for _, row in last_30.iterrows():
-        if row['notes']:
-            date_str = row['timestamp'].strftime("%Y-%m-%d")
-            notes_text += f"- [{date_str}] {row['project']} ({row['duration']}m): {row['notes']}\n"
-
-    # Construct the Prompt
-    prompt = f"""
+PROMPT_HEAD = """
     ACT AS: A ruthlessly efficient Hedge Fund Manager reviewing a Portfolio Manager's performance.
-    
+
     CONTEXT:
-    I am a student/engineer managing my life like a portfolio. 
+    I am a student/engineer managing my life like a portfolio.
     - 'Core' assets are daily habits (News App, Trading Algos).
     - 'Deep Work' assets are high-value projects (Agentic AI).
     - 'Social' is liquidity.
-    
-    DATA (LAST 30 DAYS):
+
+    DATA ({label}):
     - Total Alpha Generated: {total_points}
     - Primary Asset Focus: {top_project}
-    
+
     LOGS & NOTES:
-    {notes_text}
-    
+    """
+
+PROMPT_TAIL = """
+
     TASK:
-    Write a "Monthly Shareholder Letter" to me.
+    Write a "{letter}" to me.
     1. Analyze my asset allocation. Did I over-index on low-value tasks?
     2. Roast me for any inconsistencies found in the logs.
     3. Highlight the specific wins based on the notes.
     4. Give a "Buy/Sell/Hold" rating on my current trajectory.
     """
-    
+
+# The letter is named after the period it reviews.
+LETTERS = {"week": "Weekly Shareholder Letter", "month": "Monthly Shareholder Letter", "custom": "Shareholder Letter"}
+
+def window(kind="month", start=None, end=None, now=None):
+    # Returns (start, end, label) with start inclusive and end exclusive.
+    now = now or datetime.now()
+    if kind == "custom":
+        if start is None: raise ValueError("A custom window needs --start.")
+        end = end or now.date()
+        return (datetime.combine(start, datetime.min.time()), datetime.combine(end + timedelta(days=1), datetime.min.time()),
+                f"{start.isoformat()} TO {end.isoformat()}")
+    days = WINDOWS[kind]
+    today = now.date()
+    return (datetime.combine(today - timedelta(days=days - 1), datetime.min.time()),
+            datetime.combine(today + timedelta(days=1), datetime.min.time()), f"LAST {days} DAYS")
+
+def _kpi_span(start, end):
+    # The KPI store's window for exactly [start, end), if it keeps one.
+    midnight = datetime.min.time()
+    if start.time() != midnight or end.time() != midnight: return None
+    days = (start.date().isoformat(), (end.date() - timedelta(days=1)).isoformat())
+    return next((span for span in kpis.WINDOWS if kpis.bounds(span, date.today()) == days), None)
+
+def _stats(c, bounds, cold, span=None):
+    # Windows the KPI store keeps take their totals and top project from it;
+    # only the note sizes are counted here.
+    c.execute("SELECT COUNT(*), SUM(CASE WHEN notes != '' THEN length(project) + length(notes) END), "
+              "COUNT(CASE WHEN notes != '' THEN 1 END) FROM logs WHERE ts >= ? AND ts < ?", bounds)
+    rows, note_chars, note_rows = c.fetchone()
+    note_chars = note_chars or 0
+    if cold is not None:
+        noted = cold['notes'] != ''
+        rows += len(cold)
+        note_chars += int((cold['project'].astype(str).str.len() + cold['notes'].str.len())[noted].sum())
+        note_rows += int(noted.sum())
+    note_chars += LINE_OVERHEAD * note_rows
+    if span:
+        values = kpis.read(c)
+        return rows, int(kpis.value(values, span, 'points')), note_chars, note_rows, kpis.top_project(values, span)
+
+    c.execute("SELECT COALESCE(SUM(points), 0) FROM logs WHERE ts >= ? AND ts < ?", bounds)
+    total_points = c.fetchone()[0]
+    c.execute("SELECT project, COALESCE(SUM(duration), 0) FROM logs WHERE ts >= ? AND ts < ? GROUP BY project", bounds)
+    minutes = Counter(dict(c.fetchall()))
+    if cold is not None:
+        total_points += int(cold['points'].sum())
+        minutes.update({p: int(m) for p, m in cold.groupby('project', observed=True)['duration'].sum().items()})
+    top = minutes.most_common(1)
+    return rows, total_points, note_chars, note_rows, top[0][0] if top else None
+
+def _note_chunks(c, bounds, cold):
+    # (day, project, duration, notes) rows in chunks: the window's archived
+    # rows first, then the live table streamed from a cursor.
+    if cold is not None:
+        cold = cold[cold['notes'] != '']
+        yield list(zip((cold['ts'] // db.DAY_US).tolist(), cold['project'].astype(str).tolist(),
+                       cold['duration'].tolist(), cold['notes'].tolist()))
+    c.execute("SELECT day, project, duration, notes FROM logs "
+              "WHERE ts >= ? AND ts < ? AND notes != '' ORDER BY ts", bounds)
+    while True:
+        rows = c.fetchmany(CHUNK_ROWS)
+        if not rows: return
+        yield rows
+
+def _write_notes(out, chunks, note_chars, budget):
+    # Writes note lines until the budget runs out. If the window's notes will
+    # not fit, every k-th one is kept so the sample spans the whole window;
+    # whatever is left out is summarized per project at the end.
+    stride = max(1, math.ceil(note_chars / budget)) if budget > 0 else 0
+    used = 0
+    omitted = {}
+    i = 0
+    for rows in chunks:
+        for day, project, duration, notes in rows:
+            line = f"- [{db.from_day_number(day).isoformat()}] {project} ({duration}m): {notes}\n"
+            if stride and i % stride == 0 and used + len(line) <= budget:
+                out.write(line)
+                used += len(line)
+            else:
+                count, minutes = omitted.get(project, (0, 0))
+                omitted[project] = (count + 1, minutes + (duration or 0))
+            i += 1
+
+    if omitted:
+        skipped = sum(n for n, _ in omitted.values())
+        out.write(f"- ... {skipped} more notes omitted to fit the budget"
+                  f"{', sampled evenly across the window' if stride > 1 else ''}. Omitted by asset:\n")
+        ranked = sorted(omitted.items(), key=lambda kv: -kv[1][1])
+        for project, (count, minutes) in ranked[:SUMMARY_PROJECTS]:
+            out.write(f"  - {project}: {count} sessions, {minutes}m\n")
+        if len(ranked) > SUMMARY_PROJECTS: out.write(f"  - {len(ranked) - SUMMARY_PROJECTS} other assets\n")
+
+def _cold_rows(bounds):
+    # Windows reaching back past the live table pull in the archived months
+    # they cover. Only those import archive (and numpy/pandas with it).
+    if db.query_one("SELECT 1 FROM archived_months WHERE last_ts >= ? AND first_ts < ? LIMIT 1", bounds) is None: return None
+    import archive
+    return archive.read_cold(*bounds, columns=("ts", "project", "duration", "points", "notes"))
+
+def build_report(start, end, label, max_chars=MAX_CHARS, kind="custom"):
+    # Returns the prompt text, or None if the window has no logs.
+    bounds = (db.epoch_us(start), db.epoch_us(end))
+    c = db.get_conn().cursor()
+    cold = _cold_rows(bounds)
+    rows, total_points, note_chars, _, top_project = _stats(c, bounds, cold, _kpi_span(start, end))
+    if not rows: return None
+
+    out = io.StringIO()
+    out.write(PROMPT_HEAD.format(label=label, total_points=total_points, top_project=top_project))
+    tail = PROMPT_TAIL.format(letter=LETTERS[kind])
+    # The fixed text and the omission summary come out of the same budget.
+    reserve = len(tail) + 120 + 60 * (SUMMARY_PROJECTS + 1)
+    _write_notes(out, _note_chunks(c, bounds, cold), note_chars, max_chars - out.tell() - reserve)
+    out.write(tail)
+    return out.getvalue()
+
+def save_report(text, path):
+    with open(path, "w", buffering=1 << 16) as f: f.write(text)
+
+def generate_llm_prompt(kind="month", start=None, end=None, max_chars=MAX_CHARS, out=None):
+    try: first, last, label = window(kind, start, end)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    if not os.path.exists(db.current_file()):
+        print("No database found.")
+        return
+    if db.needs_migration(): db.init_schema()
+    prompt = build_report(first, last, label, max_chars, kind)
+    if prompt is None:
+        print(f"No data in {label.lower()}.")
+        return
+
+    if out:
+        save_report(prompt, out)
+        print(f"✅ Report written to {out} ({len(prompt):,} chars, ~{len(prompt) // CHARS_PER_TOKEN:,} tokens).")
+        return
     print("-" * 50)
     print("COPY THE TEXT BELOW AND PASTE INTO CHATGPT/CLAUDE")
     print("-" * 50)
     print(prompt)
     print("-" * 50)
 
+# --- BATCH MODE ---
+# One report per calendar week (Monday first) or month across a span of
+# history, fanned out over a process pool. Each worker opens the DB file
+# itself and reads only its own window, so a back-fill takes about as long
+# as its largest window. The reports land in one directory with an
+# index.json listing them; windows without logs are listed without a file.
+PERIODS = ("week", "month")
+INDEX_FILE = "index.json"
+
+def periods(kind, first, last):
+    # (first_day, last_day, name) for each period overlapping first..last, clipped to it.
+    start = first - timedelta(days=first.weekday()) if kind == "week" else first.replace(day=1)
+    while start <= last:
+        if kind == "week":
+            following = start + timedelta(days=7)
+            year, week, _ = start.isocalendar()
+            name = f"week-{year}-W{week:02d}"
+        else:
+            following = (start + timedelta(days=32)).replace(day=1)
+            name = f"month-{start:%Y-%m}"
+        yield max(start, first), min(following - timedelta(days=1), last), name
+        start = following
+
+def _batch_worker(db_file):
+    db.DB_FILE = db_file
+
+def _batch_report(kind, first, last, name, max_chars, out_dir):
+    prompt = build_report(*window("custom", first, last), max_chars, kind)
+    entry = {'name': name, 'first_day': first.isoformat(), 'last_day': last.isoformat(), 'file': None, 'chars': 0}
+    if prompt is not None:
+        save_report(prompt, os.path.join(out_dir, f"{name}.txt"))
+        entry.update(file=f"{name}.txt", chars=len(prompt))
+    return entry
+
+def _run_batch(jobs, workers, db_file):
+    # Yields (position, entry) as windows finish. One worker needs no pool.
+    if workers == 1:
+        for i, job in enumerate(jobs): yield i, _batch_report(*job)
+        return
+    # Spawned rather than forked: workers must not inherit pooled connections.
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_batch_worker, initargs=(db_file,)) as pool:
+        futures = {pool.submit(_batch_report, *job): i for i, job in enumerate(jobs)}
+        for future in as_completed(futures): yield futures[future], future.result()
+
+def generate_batch(kind, first, last=None, out_dir="reports", max_chars=MAX_CHARS, workers=None, progress=print):
+    # Returns the index entries, in window order.
+    last = last or date.today()
+    if first > last: raise ValueError("--start is after --end.")
+    if not os.path.exists(db.current_file()): raise ValueError(f"No database found at {db.current_file()}.")
+    jobs = [(kind, f, l, name, max_chars, out_dir) for f, l, name in periods(kind, first, last)]
+    if db.needs_migration(): db.init_schema()    # once, here: the workers only read
+    os.makedirs(out_dir, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    entries = [None] * len(jobs)
+    for i, entry in _run_batch(jobs, workers, db.current_file()):
+        entries[i] = entry
+        if entry['file']: progress(f"✅ {entry['name']}: {entry['chars']:,} chars")
+        else: progress(f"⚪ {entry['name']}: no logs")
+    with open(os.path.join(out_dir, INDEX_FILE), "w") as f:
+        json.dump({'period': kind, 'first_day': first.isoformat(), 'last_day': last.isoformat(),
+                   'max_chars': max_chars, 'reports': entries}, f, indent=1)
+    return entries
+
 if __name__ == "__main__":
-    generate_llm_prompt()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build an LLM review prompt from a window of the ledger.")
+    parser.add_argument("--window", choices=list(WINDOWS) + ["custom"], default="month")
+    parser.add_argument("--start", type=date.fromisoformat, help="first day of a custom window")
+    parser.add_argument("--end", type=date.fromisoformat, help="last day of a custom window (default: today)")
+    parser.add_argument("--max-chars", type=int, default=MAX_CHARS)
+    parser.add_argument("--max-tokens", type=int, help=f"overrides --max-chars (~{CHARS_PER_TOKEN} chars per token)")
+    parser.add_argument("--out", help="write the prompt to a file instead of stdout")
+    parser.add_argument("--batch", choices=PERIODS, help="one report per week or month from --start to --end")
+    parser.add_argument("--out-dir", default="reports", help="where --batch writes its reports and index")
+    parser.add_argument("--workers", type=int, help="batch worker processes (default: one per CPU)")
+    parser.add_argument("--db", default=db.DB_FILE)
+    parser.add_argument("--portfolio", help="portfolio name (overrides --db)")
+    args = parser.parse_args()
+    db.DB_FILE = args.db
+    if args.portfolio: db.use_portfolio(args.portfolio)
+    max_chars = args.max_tokens * CHARS_PER_TOKEN if args.max_tokens else args.max_chars
+    if args.batch:
+        if args.start is None: parser.error("--batch needs --start.")
+        try: entries = generate_batch(args.batch, args.start, args.end, args.out_dir, max_chars, args.workers)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"✅ {sum(1 for e in entries if e['file'])} of {len(entries)} reports written to {args.out_dir}/ "
+              f"(see {INDEX_FILE}).")
+    else: generate_llm_prompt(args.window, args.start, args.end, max_chars, args.out)
@@ -0,0 +1,222 @@
+import sys
+from datetime import date
+import db
+import kpis
+
+# --- DAILY ROLLUP ---
+# One row per calendar day, kept in step with `logs` by every writer so the
+# dashboard charts scale with the number of days rather than log rows.
+# Tier membership follows the active tasks table, as the dashboard always has.
+
+def create_table(c):
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='daily_summary'")
+    exists = c.fetchone() is not None
+    c.execute('''CREATE TABLE IF NOT EXISTS daily_summary
+                 (day TEXT PRIMARY KEY,
+                  total_points INTEGER,
+                  total_duration INTEGER,
+                  social_points INTEGER,
+                  core_met INTEGER,
+                  deep_work_tokens INTEGER)''')
+    # What archived (cold) logs contributed to each day, frozen when they were
+    # moved out; every aggregate below adds it to what is still in `logs`.
+    c.execute('''CREATE TABLE IF NOT EXISTS archived_summary
+                 (day TEXT PRIMARY KEY,
+                  total_points INTEGER,
+                  total_duration INTEGER,
+                  social_points INTEGER,
+                  core_met INTEGER,
+                  deep_work_tokens INTEGER)''')
+    # The same per (day, project), for the rolling KPIs (see kpis.py).
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='project_summary'")
+    projects_exist = c.fetchone() is not None
+    c.execute('''CREATE TABLE IF NOT EXISTS project_summary
+                 (day TEXT,
+                  project TEXT,
+                  sessions INTEGER,
+                  duration INTEGER,
+                  points INTEGER,
+                  PRIMARY KEY (day, project))''')
+    c.execute('''CREATE TABLE IF NOT EXISTS archived_project_summary
+                 (day TEXT,
+                  project TEXT,
+                  sessions INTEGER,
+                  duration INTEGER,
+                  points INTEGER,
+                  PRIMARY KEY (day, project))''')
+    if exists and not projects_exist: c.execute(_PROJECT_AGGREGATE.format(where="", archived_where=""))
+    if create_ema_table(c) and exists: rebuild_ema(c)
+    if kpis.create_table(c) and exists: kpis.refresh(c)
+    return not exists
+
+SUMMARY_COLUMNS = "day, total_points, total_duration, social_points, core_met, deep_work_tokens"
+
+_AGGREGATE = f'''INSERT INTO daily_summary ({SUMMARY_COLUMNS})
+                SELECT day, SUM(total_points), SUM(total_duration), SUM(social_points),
+                       MAX(core_met), SUM(deep_work_tokens)
+                FROM (SELECT date(l.day * 86400, 'unixepoch') AS day,
+                             SUM(l.points) AS total_points,
+                             SUM(l.duration) AS total_duration,
+                             SUM(CASE WHEN t.tier = 'Social' THEN l.points ELSE 0 END) AS social_points,
+                             MAX(CASE WHEN t.tier = 'Core' AND l.duration >= 20 THEN 1 ELSE 0 END) AS core_met,
+                             SUM(CASE WHEN t.tier = 'Deep Work' AND l.duration >= 90 THEN 1 ELSE 0 END) AS deep_work_tokens
+                      FROM logs l LEFT JOIN tasks t ON t.name = l.project AND t.active = 1
+                      {{where}}
+                      GROUP BY l.day
+                      UNION ALL
+                      SELECT {SUMMARY_COLUMNS} FROM archived_summary {{archived_where}})
+                GROUP BY day'''
+
+PROJECT_COLUMNS = "day, project, sessions, duration, points"
+
+_PROJECT_AGGREGATE = f'''INSERT INTO project_summary ({PROJECT_COLUMNS})
+                        SELECT day, project, SUM(sessions), SUM(duration), SUM(points)
+                        FROM (SELECT date(l.day * 86400, 'unixepoch') AS day, l.project,
+                                     COUNT(*) AS sessions, SUM(l.duration) AS duration, SUM(l.points) AS points
+                              FROM logs l
+                              {{where}}
+                              GROUP BY l.day, l.project
+                              UNION ALL
+                              SELECT {PROJECT_COLUMNS} FROM archived_project_summary {{archived_where}})
+                        GROUP BY day, project'''
+
+def _ts_range(first_day, last_day):
+    # ts bounds covering the ISO days first_day..last_day inclusive.
+    return db.day_bounds(date.fromisoformat(first_day))[0], db.day_bounds(date.fromisoformat(last_day))[1]
+
+def _aggregate(c, first_day, last_day):
+    params = _ts_range(first_day, last_day) + (first_day, last_day)
+    for sql in (_AGGREGATE, _PROJECT_AGGREGATE):
+        c.execute(sql.format(where="WHERE l.ts >= ? AND l.ts < ?", archived_where="WHERE day >= ? AND day <= ?"), params)
+
+def _social_points(c, day):
+    c.execute("SELECT social_points FROM daily_summary WHERE day = ?", (day,))
+    row = c.fetchone()
+    return None if row is None else row[0] or 0
+
+def refresh_day(c, day):
+    day = str(day)[:10]
+    before = _social_points(c, day)
+    c.execute("DELETE FROM daily_summary WHERE day = ?", (day,))
+    c.execute("DELETE FROM project_summary WHERE day = ?", (day,))
+    _aggregate(c, day, day)
+    fold_ema(c, day, before, _social_points(c, day))
+    kpis.refresh_day(c, day)
+
+def refresh_range(c, first_day, last_day):
+    first_day, last_day = str(first_day)[:10], str(last_day)[:10]
+    c.execute("DELETE FROM daily_summary WHERE day >= ? AND day <= ?", (first_day, last_day))
+    c.execute("DELETE FROM project_summary WHERE day >= ? AND day <= ?", (first_day, last_day))
+    _aggregate(c, first_day, last_day)
+    rebuild_ema(c)
+    kpis.refresh(c)
+
+def refresh_project(c, project):
+    # A task being listed, delisted or re-tiered changes every day it was
+    # logged on, all re-aggregated in one pass; project_summary does not
+    # depend on tiers. Archived days keep the tiers they were archived with.
+    days = "SELECT DISTINCT date(p.day * 86400, 'unixepoch') FROM logs p WHERE p.project = ?"
+    c.execute(f"DELETE FROM daily_summary WHERE day IN ({days})", (project,))
+    c.execute(_AGGREGATE.format(where="WHERE l.day IN (SELECT DISTINCT p.day FROM logs p WHERE p.project = ?)",
+                                archived_where=f"WHERE day IN ({days})"), (project, project))
+    rebuild_ema(c)
+    kpis.refresh(c)
+
+def rebuild(c):
+    c.execute("DELETE FROM daily_summary")
+    c.execute("DELETE FROM project_summary")
+    c.execute(_AGGREGATE.format(where="", archived_where=""))
+    c.execute(_PROJECT_AGGREGATE.format(where="", archived_where=""))
+    rebuild_ema(c)
+    kpis.refresh(c)
+
+# --- SOCIAL EMA STATE ---
+# The dashboard's social EMA is pandas' ewm(span=7) (adjust=True) over daily
+# social points from the first logged day to today. It is stored as its
+# running numerator and denominator through `day`: reading it only decays
+# those across the days since, and a change to any one day's points lands
+# as a delta weighted by how long ago that day was.
+EMA_SPAN = 7
+EMA_DECAY = 1 - 2 / (EMA_SPAN + 1)
+
+def create_ema_table(c):
+    c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='social_ema'")
+    exists = c.fetchone() is not None
+    c.execute('''CREATE TABLE IF NOT EXISTS social_ema
+                 (id INTEGER PRIMARY KEY CHECK (id = 1),
+                  first_day TEXT,
+                  day TEXT,
+                  num REAL,
+                  den REAL)''')
+    return not exists
+
+def _days(first, last):
+    return (date.fromisoformat(last) - date.fromisoformat(first)).days
+
+def _advance(num, den, days):
+    # `days` more steps with no social points.
+    decay = EMA_DECAY ** days
+    return num * decay, den * decay + (1 - decay) / (1 - EMA_DECAY)
+
+def _scratch_ema(c):
+    c.execute("SELECT day, social_points FROM daily_summary ORDER BY day")
+    rows = c.fetchall()
+    if not rows: return None
+    num, den = 0.0, 0.0
+    last = None
+    for day, points in rows:
+        # Each logged day is one step after the empty days before it.
+        num, den = _advance(num, den, _days(last, day) - 1) if last else (num, den)
+        num, den = num * EMA_DECAY + (points or 0), den * EMA_DECAY + 1
+        last = day
+    return rows[0][0], last, num, den
+
+def rebuild_ema(c):
+    state = _scratch_ema(c)
+    c.execute("DELETE FROM social_ema")
+    if state: c.execute("INSERT INTO social_ema (id, first_day, day, num, den) VALUES (1, ?, ?, ?, ?)", state)
+
+def fold_ema(c, day, before, after):
+    # before/after are the day's social points around a refresh (None: no row).
+    c.execute("SELECT first_day, day, num, den FROM social_ema WHERE id = 1")
+    state = c.fetchone()
+    # The series starts on the first logged day, so moving that start means
+    # every weight changes: recompute instead.
+    if state is None or day < state[0] or (after is None and day == state[0]): return rebuild_ema(c)
+    delta = (after or 0) - (before or 0)
+    if not delta: return
+    first_day, last, num, den = state
+    if day > last:
+        num, den = _advance(num, den, _days(last, day))
+        last = day
+    num += delta * EMA_DECAY ** _days(day, last)
+    c.execute("UPDATE social_ema SET day = ?, num = ?, den = ? WHERE id = 1", (last, num, den))
+
+def social_ema(c, today):
+    c.execute("SELECT day, num, den FROM social_ema WHERE id = 1")
+    state = c.fetchone()
+    if state is None: return 0
+    num, den = _advance(state[1], state[2], max(_days(state[0], today.isoformat()), 0))
+    return num / den
+
+if __name__ == "__main__":
+    if sys.argv[1:] not in (["rebuild"], ["verify-ema"]):
+        print("usage: python rollup.py rebuild | verify-ema")
+        sys.exit(1)
+    if sys.argv[1] == "verify-ema":
+        with db.transaction() as c:
+            create_table(c)
+            stored = social_ema(c, date.today())
+            rebuild_ema(c)
+            scratch = social_ema(c, date.today())
+        print(f"stored {stored:.6f} / from scratch {scratch:.6f}")
+        if abs(stored - scratch) > 1e-9:
+            print("❌ social EMA state had drifted; rebuilt it.")
+            sys.exit(1)
+        print("✅ social EMA state matches a rebuild.")
+        sys.exit(0)
+    with db.transaction() as c:
+        create_table(c)
+        rebuild(c)
+        c.execute("SELECT count(*) FROM daily_summary")
+        print(f"✅ daily_summary rebuilt: {c.fetchone()[0]} days.")
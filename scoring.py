@@ -0,0 +1,261 @@
+import re
+import sys
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+# --- SCORING RULES ---
+# Pure functions: nothing in here reads the clock or the database. The live
+# path (app.log_work) scores one session against a DayContext; the batch path
+# replays any number of sessions in a single vectorized pass.
+CORE_MIN_MINUTES = 20
+CORE_BASE = 10
+CORE_MORNING_BONUS = 5
+CORE_MORNING_CUTOFF = 17
+CORE_DEEP_MINUTES = 90
+CORE_DEEP_BONUS = 15
+DEEP_WORK_MINUTES = 90
+DEEP_WORK_FULL = 30
+DEEP_WORK_PARTIAL = 5
+RENT_POINTS = 10
+VOLLEYBALL_POINTS = 25
+EXAM_SURGE_POINTS = 20
+SOCIAL_DAILY_CAP = 40
+SOCIAL_POINTS = {"Deep Convo / New People": 30, "Hangout / Activity": 15, "Casual Check-up": 5}
+EXAM_WINDOW = pd.Timedelta(hours=72)
+
+ZOMBIE_NOTE = " (ZOMBIE TAX -50%)"
+TIRED_NOTE = " (TIRED TAX -20%)"
+VAMPIRE_NOTE = " (VAMPIRE PENALTY)"
+EXAM_SURGE_NOTE = " (EXAM SURGE)"
+SOCIAL_CAP_NOTE = " (Social Cap Hit)"
+_MARKERS = re.compile(r" \((ZOMBIE TAX -50%|TIRED TAX -20%|VAMPIRE PENALTY|EXAM SURGE|Social Cap Hit)\)")
+
+@dataclass
+class Session:
+    project: str
+    tier: str
+    duration: int
+    sleep_hours: float = 8.0
+    social_subtype: str = None
+    notes: str = ""
+
+@dataclass
+class DayContext:
+    hour: int
+    exam_mode: bool = False
+    prior_sessions: int = 0        # rows already logged today for this project
+    prior_duration: int = 0
+    prior_points: int = 0
+    base_collected: bool = False   # an earlier row today earned >= CORE_BASE
+
+    @classmethod
+    def from_logs(cls, project_logs, hour, exam_mode=False):
+        return cls(hour=hour, exam_mode=exam_mode, prior_sessions=len(project_logs),
+                   prior_duration=int(project_logs['duration'].sum()),
+                   prior_points=int(project_logs['points'].sum()),
+                   base_collected=bool((project_logs['points'] >= CORE_BASE).any()))
+
+@dataclass
+class Score:
+    points: int
+    notes: str
+    vampire: bool = False
+
+def sleep_multiplier(sleep_hours):
+    if sleep_hours < 5: return 0.5, ZOMBIE_NOTE
+    if sleep_hours < 6.5: return 0.8, TIRED_NOTE
+    return 1.0, ""
+
+def is_vampire(project, tier, hour, exam_mode):
+    is_exempt_activity = (tier == 'Social') or (project == 'Volleyball')
+    return (0 <= hour < 6) and not exam_mode and not is_exempt_activity
+
+def score_session(session, ctx):
+    multiplier, notes = sleep_multiplier(session.sleep_hours)
+    notes = session.notes + notes
+    if is_vampire(session.project, session.tier, ctx.hour, ctx.exam_mode):
+        return Score(0, notes + VAMPIRE_NOTE, vampire=True)
+
+    points = 0
+    duration = session.duration
+    if session.tier == "Core":
+        if duration >= CORE_MIN_MINUTES and not ctx.base_collected:
+            points += CORE_BASE
+            if ctx.hour < CORE_MORNING_CUTOFF: points += CORE_MORNING_BONUS
+        if ctx.prior_duration + duration >= CORE_DEEP_MINUTES and ctx.prior_duration < CORE_DEEP_MINUTES:
+            points += CORE_DEEP_BONUS
+
+    elif session.tier == "Deep Work":
+        points = DEEP_WORK_FULL if duration >= DEEP_WORK_MINUTES else DEEP_WORK_PARTIAL
+
+    elif session.tier == "Rent":
+        if ctx.prior_sessions == 0:
+            if session.project == "Volleyball": points = VOLLEYBALL_POINTS
+            elif ctx.exam_mode and session.project == "Academics": points = EXAM_SURGE_POINTS; notes += EXAM_SURGE_NOTE
+            else: points = RENT_POINTS
+
+    elif session.tier == "Social":
+        if ctx.prior_points < SOCIAL_DAILY_CAP: points = SOCIAL_POINTS.get(session.social_subtype, 0)
+        else: notes += SOCIAL_CAP_NOTE
+
+    return Score(int(points * multiplier), notes)
+
+# --- BATCH ENGINE ---
+def exam_mode_at(timestamps, activations):
+    # True where the latest activation at or before each timestamp is < 72h old.
+    ts = np.asarray(timestamps, dtype='datetime64[ns]')
+    acts = np.sort(np.asarray(activations, dtype='datetime64[ns]'))
+    if len(acts) == 0: return np.zeros(len(ts), dtype=bool)
+    idx = np.searchsorted(acts, ts, side='right') - 1
+    latest = acts[np.clip(idx, 0, None)]
+    return (idx >= 0) & (ts < latest + EXAM_WINDOW.to_timedelta64())
+
+# Scores `sessions` (timestamp, project, tier, duration and optionally
+# sleep_hours, social_subtype, notes) in timestamp order, exactly as repeated
+# log_work calls would. `history` holds rows already on the ledger (timestamp,
+# project, duration, points): they shape each day's context but keep their
+# points. Returns `sessions` with points, notes and vampire columns added.
+def score_batch(sessions, history=None, exam_activations=()):
+    s = pd.DataFrame({
+        'timestamp': pd.to_datetime(sessions['timestamp'], format='ISO8601'),
+        'project': sessions['project'].to_numpy(),
+        'tier': sessions['tier'].to_numpy(),
+        'duration': sessions['duration'].to_numpy(dtype=np.int64),
+        'sleep_hours': sessions['sleep_hours'].to_numpy(dtype=float) if 'sleep_hours' in sessions else 8.0,
+        'social_subtype': sessions['social_subtype'].to_numpy() if 'social_subtype' in sessions else None,
+        'notes': sessions['notes'].fillna('').to_numpy() if 'notes' in sessions else '',
+        'points': 0, 'fixed': False, 'order': np.arange(len(sessions)),
+    })
+    frames = [s]
+    if history is not None and len(history):
+        h = pd.DataFrame({
+            'timestamp': pd.to_datetime(history['timestamp'], format='ISO8601'),
+            'project': history['project'].to_numpy(), 'tier': None,
+            'duration': history['duration'].to_numpy(dtype=np.int64),
+            'sleep_hours': 8.0, 'social_subtype': None, 'notes': '',
+            'points': history['points'].to_numpy(dtype=np.int64), 'fixed': True, 'order': -1,
+        })
+        frames.insert(0, h)
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else s
+    df = df.sort_values(['timestamp', 'fixed'], ascending=[True, False], kind='stable', ignore_index=True)
+
+    ts = df['timestamp']
+    hour = ts.dt.hour.to_numpy()
+    tier = df['tier'].to_numpy()
+    project = df['project'].to_numpy()
+    duration = df['duration'].to_numpy()
+    fixed = df['fixed'].to_numpy()
+    stored = df['points'].to_numpy()
+    groups = df.groupby([ts.dt.normalize(), df['project']], sort=False).ngroup().to_numpy()
+    by_group = pd.Series(groups)
+
+    def prior_sum(values):
+        values = pd.Series(values)
+        return (values.groupby(by_group).cumsum() - values).to_numpy()
+
+    sleep = df['sleep_hours'].to_numpy(dtype=float)
+    multiplier = np.where(sleep < 5, 0.5, np.where(sleep < 6.5, 0.8, 1.0))
+    exam = exam_mode_at(ts, exam_activations)
+    exempt = (tier == 'Social') | (project == 'Volleyball')
+    vampire = (hour < 6) & ~exam & ~exempt & ~fixed
+    prior_sessions = by_group.groupby(by_group).cumcount().to_numpy()
+    prior_duration = prior_sum(duration)
+
+    # Core: the base is paid until some earlier row that day scored >= CORE_BASE.
+    # Before that row every eligible session was paid the base, so "scored >=
+    # CORE_BASE" can be evaluated up front and carried forward with a cumsum.
+    deep_bonus = (prior_duration + duration >= CORE_DEEP_MINUTES) & (prior_duration < CORE_DEEP_MINUTES)
+    eligible = (duration >= CORE_MIN_MINUTES) & ~vampire
+    with_base = CORE_BASE + CORE_MORNING_BONUS * (hour < CORE_MORNING_CUTOFF) + CORE_DEEP_BONUS * deep_bonus
+    without_base = CORE_DEEP_BONUS * deep_bonus
+    pays_base = np.where(eligible, np.trunc(with_base * multiplier), np.trunc(without_base * multiplier)) >= CORE_BASE
+    crossed = np.where(fixed, stored >= CORE_BASE, pays_base & ~vampire).astype(np.int64)
+    base = eligible & (prior_sum(crossed) == 0)
+    core = np.where(base, with_base, without_base)
+
+    deep_work = np.where(duration >= DEEP_WORK_MINUTES, DEEP_WORK_FULL, DEEP_WORK_PARTIAL)
+
+    first_today = prior_sessions == 0
+    surge = first_today & exam & (project == 'Academics')
+    rent = np.where(~first_today, 0, np.where(project == 'Volleyball', VOLLEYBALL_POINTS,
+                                              np.where(surge, EXAM_SURGE_POINTS, RENT_POINTS)))
+
+    # Social: scored points only grow until the cap is reached, so the running
+    # total of uncapped scores equals the real running total up to that point.
+    social_base = pd.Series(df['social_subtype'].to_numpy()).map(SOCIAL_POINTS).fillna(0).to_numpy(dtype=np.int64)
+    social_scored = np.where(fixed, stored, np.trunc(social_base * multiplier)).astype(np.int64)
+    capped = (tier == 'Social') & (prior_sum(social_scored) >= SOCIAL_DAILY_CAP)
+    social = np.where(capped, 0, social_base)
+
+    raw = np.select([tier == 'Core', tier == 'Deep Work', tier == 'Rent', tier == 'Social'],
+                    [core, deep_work, rent, social], 0)
+    points = np.where(vampire, 0, np.trunc(raw * multiplier)).astype(np.int64)
+
+    notes = pd.Series(df['notes'].to_numpy(), dtype=object)
+    notes = notes + np.where(sleep < 5, ZOMBIE_NOTE, np.where(sleep < 6.5, TIRED_NOTE, ""))
+    notes = notes + np.where(vampire, VAMPIRE_NOTE, np.where((tier == 'Rent') & surge, EXAM_SURGE_NOTE,
+                                                             np.where(capped, SOCIAL_CAP_NOTE, "")))
+
+    out = pd.DataFrame({'order': df['order'].to_numpy(), 'points': points, 'notes': notes.to_numpy(),
+                        'vampire': vampire})[~fixed].sort_values('order')
+    result = sessions.reset_index(drop=True).copy()
+    result['points'] = out['points'].to_numpy()
+    result['notes'] = out['notes'].to_numpy()
+    result['vampire'] = out['vampire'].to_numpy()
+    return result
+
+# --- LEDGER REPLAY ---
+def sessions_from_ledger(logs, tasks):
+    # The ledger only keeps what log_work wrote, so sleep and social type are
+    # recovered from the markers and points it left behind. Capped Social rows
+    # carry no trace of their type and replay as unknown.
+    tiers = dict(zip(tasks['name'], tasks['tier']))
+    sessions = logs[logs['project'].map(tiers).notna()].copy()
+    sessions['tier'] = sessions['project'].map(tiers)
+    notes = sessions['notes'].fillna('')
+    sessions['sleep_hours'] = np.where(notes.str.contains(ZOMBIE_NOTE, regex=False), 4.0,
+                                       np.where(notes.str.contains(TIRED_NOTE, regex=False), 6.0, 8.0))
+    multiplier = np.where(sessions['sleep_hours'] < 5, 0.5, np.where(sessions['sleep_hours'] < 6.5, 0.8, 1.0))
+    base = sessions['points'] / multiplier
+    subtype = {v: k for k, v in SOCIAL_POINTS.items()}
+    guess = pd.Series(np.select([base >= 22, base >= 10, base > 0], [30, 15, 5], 0), index=sessions.index).map(subtype)
+    sessions['social_subtype'] = np.where(sessions['tier'] == 'Social', guess, None)
+    sessions['notes'] = notes.str.replace(_MARKERS, '', regex=True)
+    return sessions
+
+def replay_ledger(logs, tasks):
+    # Re-scores every session on the ledger under the current rules. Rows that
+    # are not sessions (System, bounties, delisted projects) stay as history.
+    sessions = sessions_from_ledger(logs, tasks)
+    history = logs.drop(sessions.index)
+    activations = history.loc[(history['project'] == 'System') & (history['notes'] == 'Exam Mode Activated'), 'timestamp']
+    rescored = score_batch(sessions, history=history[history['project'] != 'System'],
+                           exam_activations=pd.to_datetime(activations, format='ISO8601'))
+    rescored.index = sessions.index
+    return rescored
+
+if __name__ == "__main__":
+    import archive
+    import db
+    import rollup
+    if sys.argv[1:2] != ["rescore"]:
+        print("usage: python scoring.py rescore [--apply]")
+        sys.exit(1)
+    # Archived rows cannot be rewritten and would be missing as history.
+    if archive.partitions():
+        print("❌ The ledger has archived months; restore them with archive.py before rescoring.")
+        sys.exit(1)
+    logs = db.read_sql("SELECT id, ts, project, duration, points, notes FROM logs")
+    logs.insert(1, 'timestamp', pd.to_datetime(logs.pop('ts').astype('int64'), unit='us'))
+    tasks = db.read_sql("SELECT name, tier FROM tasks WHERE active=1")
+    rescored = replay_ledger(logs, tasks)
+    changed = rescored[(rescored['points'] != logs.loc[rescored.index, 'points'])]
+    print(f"Re-scored {len(rescored)} sessions: {len(changed)} changed, "
+          f"net {int(changed['points'].sum() - logs.loc[changed.index, 'points'].sum()):+d} PTS.")
+    if "--apply" in sys.argv:
+        with db.transaction() as c:
+            c.executemany("UPDATE logs SET points=?, notes=? WHERE id=?",
+                          zip(changed['points'].tolist(), changed['notes'].tolist(), changed['id'].tolist()))
+            rollup.rebuild(c)
+        print("✅ Ledger updated.")
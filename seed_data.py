@@ -1,66 +1,163 @@
+import argparse
+import os
 import sqlite3
-import random
-from datetime import datetime, timedelta
+import time
+from datetime import date, timedelta
+import numpy as np
+import db
+import rollup
+import scoring
 
-DB_FILE = "portfolio.db"
+CHUNK_ROWS = 100_000
 
-def seed_history():
-    conn = sqlite3.connect(DB_FILE)
+# Format: (Name, Tier, Duration, Points, Note)
+TASK_PROFILES = [
+    ("News App", "Core", 25, 15, "Fixed bug in scraper"),
+    ("Trading Algos", "Core", 45, 15, "Optimized backtest loop"),
+    ("Agentic AI", "Deep Work", 120, 30, "Implemented memory module"),
+    ("Adversarial DL", "Deep Work", 95, 30, "Read research paper"),
+    ("Academics", "Rent", 60, 10, "Finance chapter review"),
+    ("Volleyball", "Rent", 120, 25, "Practice match"),
+    ("Social Life", "Social", 180, 30, "Dinner with team"),
+]
+SYNTHETIC_TIERS = [("Core", 30, 15), ("Deep Work", 100, 30), ("Rent", 60, 10), ("Social", 120, 15)]
+
+def task_catalog(size):
+    # The real defaults first, then synthetic assets cycling through the tiers.
+    catalog = list(TASK_PROFILES[:size])
+    for i in range(len(catalog), size):
+        tier, duration, points = SYNTHETIC_TIERS[i % len(SYNTHETIC_TIERS)]
+        catalog.append((f"{tier} Asset {i}", tier, duration, points, f"Synthetic {tier.lower()} session"))
+    return catalog
+
+def generate(rng, days, end_date, events_per_day=2.5, catalog_size=len(TASK_PROFILES),
+             bounty_rate=0.02, exam_rate=0.005, needle_rate=0.6, score=False):
+    # Returns column arrays (timestamp, ts, day, project, duration, points, notes) sorted by time.
+    catalog = task_catalog(catalog_size)
+    start = np.datetime64(end_date - timedelta(days=days - 1), 'D')
+
+    # 1. Sessions: ~85% of days see work, Poisson-many sessions between 09:00 and 23:00.
+    active = rng.random(days) > 0.15
+    counts = np.where(active, np.maximum(rng.poisson(events_per_day, days), 1), 0)
+    day_of = np.repeat(np.arange(days), counts)
+    pick = rng.integers(0, len(catalog), len(day_of))
+    minute = rng.integers(9 * 60, 23 * 60, len(day_of))
+    base_duration = np.array([t[2] for t in catalog])
+    session = {
+        'day': day_of, 'minute': minute,
+        'project': np.array([t[0] for t in catalog], dtype=object)[pick],
+        'duration': base_duration[pick] + rng.integers(-5, 16, len(day_of)),
+        'points': np.array([t[3] for t in catalog])[pick],
+        'notes': np.array([f"[AUTO-SEED] {t[4]}" for t in catalog], dtype=object)[pick],
+    }
+
+    # 2. System and bounty events at their own daily rates.
+    events = []
+    for rate, project, points, note in ((needle_rate, "System", 0, "Needle Moved"),
+                                        (exam_rate, "System", -50, "Exam Mode Activated"),
+                                        (bounty_rate, "Bounty Hunt", None, "CLAIMED: Seed Bounty")):
+        hit = np.flatnonzero(rng.random(days) < rate)
+        values = rng.integers(5, 60, len(hit)) * 20 if points is None else np.full(len(hit), points)
+        notes = [f"{note} {d}" for d in hit] if project == "Bounty Hunt" else [note] * len(hit)
+        events.append({'day': hit, 'minute': rng.integers(8 * 60, 24 * 60, len(hit)),
+                       'project': np.full(len(hit), project, dtype=object), 'duration': np.zeros(len(hit), dtype=np.int64),
+                       'points': values, 'notes': np.array(notes, dtype=object)})
+
+    cols = {k: np.concatenate([session[k]] + [e[k] for e in events]) for k in session}
+    seconds = rng.integers(0, 60, len(cols['day']))
+    ts = start + cols['day'].astype('timedelta64[D]') + cols['minute'].astype('timedelta64[m]') + seconds.astype('timedelta64[s]')
+    order = np.argsort(ts, kind='stable')
+    ts = ts[order]
+    cols = {k: v[order] for k, v in cols.items()}
+
+    if score:
+        import pandas as pd
+        tiers = {t[0]: t[1] for t in catalog}
+        is_session = np.isin(cols['project'], list(tiers))
+        sessions = pd.DataFrame({'timestamp': ts[is_session], 'project': cols['project'][is_session],
+                                 'duration': cols['duration'][is_session], 'notes': cols['notes'][is_session]})
+        sessions['tier'] = sessions['project'].map(tiers)
+        sessions['sleep_hours'] = rng.choice([4.0, 6.0, 7.5, 8.0], len(sessions), p=[0.05, 0.15, 0.4, 0.4])
+        sessions['social_subtype'] = rng.choice(list(scoring.SOCIAL_POINTS), len(sessions))
+        exam = ts[(cols['project'] == "System") & (cols['notes'] == "Exam Mode Activated")]
+        scored = scoring.score_batch(sessions, exam_activations=exam)
+        cols['points'][is_session] = scored['points'].to_numpy()
+        cols['notes'][is_session] = scored['notes'].to_numpy()
+
+    stamps = np.datetime_as_string(ts, unit='s')
+    epoch = ts.astype('datetime64[us]').astype(np.int64)
+    return catalog, (stamps, epoch, epoch // db.DAY_US, cols['project'], cols['duration'].astype(np.int64),
+                     cols['points'].astype(np.int64), cols['notes'])
+
+def write(conn, catalog, columns, fresh=False, progress=print):
     c = conn.cursor()
+    c.execute("BEGIN IMMEDIATE")
+    db.create_tables(c)
+    rollup.create_table(c)
+    c.executemany("INSERT OR IGNORE INTO tasks (name, tier, active) VALUES (?, ?, 1)", [(t[0], t[1]) for t in catalog])
+    is_bounty = columns[3] == "Bounty Hunt"
+    bounties = [(n[len("CLAIMED: "):], v) for v, n in zip(columns[5][is_bounty].tolist(), columns[6][is_bounty].tolist())]
+    c.executemany("INSERT OR IGNORE INTO bounties (name, value, status) VALUES (?, ?, 'Claimed')", bounties)
 
-    # Optional: Clear existing logs to start fresh
-    # c.execute("DELETE FROM logs")
-    
-    print("🌱 Seeding 60 days of history...")
-
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=60)
-    
-    current_date = start_date
-    
-    while current_date < end_date:
-        # 1. Determine "Day Type" probability
-        # 80% chance of working, 20% chance of "Truancy" (Grey Square)
-        if random.random() > 0.15: 
-            
-            # How many tasks did we do today? (1 to 4)
-            num_tasks = random.randint(1, 4)
-            
-            for _ in range(num_tasks):
-                # Pick a random task profile
-                # Format: (Name, Duration, Points, Note)
-                task_options = [
-                    ("News App", 25, 15, "Fixed bug in scraper"),
-                    ("Trading Algos", 45, 15, "Optimized backtest loop"),
-                    ("Agentic AI", 120, 30, "Implemented memory module"), # Deep Work
-                    ("Adversarial DL", 95, 30, "Read research paper"), # Deep Work
-                    ("Academics", 60, 10, "Finance chapter review"),
-                    ("Volleyball", 120, 25, "Practice match"),
-                    ("Social Life", 180, 30, "Dinner with team"),
-                ]
-                
-                # Weighted choice: More likely to do Core/Rent than Deep Work every single time
-                choice = random.choice(task_options)
-                
-                name, duration, points, note = choice
-                
-                # Add some randomness to duration
-                actual_duration = duration + random.randint(-5, 15)
-                
-                # Construct timestamp (random time during the day)
-                hour = random.randint(9, 22)
-                minute = random.randint(0, 59)
-                timestamp = current_date.replace(hour=hour, minute=minute).isoformat()
-                
-                c.execute("INSERT INTO logs (timestamp, project, duration, points, notes) VALUES (?, ?, ?, ?, ?)", 
-                          (timestamp, name, actual_duration, points, f"[AUTO-SEED] {note}"))
-        
-        # Move to next day
-        current_date += timedelta(days=1)
+    # On a fresh file it is much cheaper to build the logs indexes once at the end.
+    indexes = []
+    if fresh:
+        c.execute("SELECT name, sql FROM sqlite_master WHERE type='index' AND tbl_name='logs' AND sql IS NOT NULL")
+        indexes = c.fetchall()
+        for name, _ in indexes: c.execute(f"DROP INDEX {name}")
 
+    total = len(columns[0])
+    for lo in range(0, total, CHUNK_ROWS):
+        chunk = [col[lo:lo + CHUNK_ROWS].tolist() for col in columns]
+        c.executemany(db.LOG_INSERT, zip(*chunk))
+        progress(f"  {min(lo + CHUNK_ROWS, total):>10,} / {total:,} rows")
+    for _, sql in indexes: c.execute(sql)
+    rollup.rebuild(c)
     conn.commit()
+
+def seed_history(days=60, seed=42, end_date=None, db_file=None, fresh=False, progress=print, **rates):
+    end_date = end_date or date.today()
+    db_file = db_file or db.current_file()
+    started = time.time()
+    catalog, columns = generate(np.random.default_rng(seed), days, end_date, **rates)
+
+    if fresh:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_file + suffix): os.remove(db_file + suffix)
+    conn = sqlite3.connect(db_file, isolation_level=None)
+    conn.execute("PRAGMA cache_size=-262144")
+    if fresh:
+        # Nothing to protect in a file we are creating: skip journaling for the
+        # load and switch to the app's WAL mode once the rows are in.
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+    write(conn, catalog, columns, fresh, progress)
+    conn.execute("PRAGMA journal_mode=WAL")
     conn.close()
-    print("✅ Database seeded! Refresh your app to see the Heatmap.")
+    progress(f"✅ Seeded {len(columns[0]):,} rows over {days} days in {time.time() - started:.2f}s.")
+    return len(columns[0])
 
 if __name__ == "__main__":
-    seed_history()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic ledger.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--years", type=float, help="overrides --days")
+    parser.add_argument("--end", type=date.fromisoformat, help="last day of history (default: today)")
+    parser.add_argument("--events-per-day", type=float, default=2.5)
+    parser.add_argument("--tasks", type=int, default=len(TASK_PROFILES), help="task catalog size")
+    parser.add_argument("--bounty-rate", type=float, default=0.02, help="claimed bounties per day")
+    parser.add_argument("--exam-rate", type=float, default=0.005, help="Exam Mode activations per day")
+    parser.add_argument("--needle-rate", type=float, default=0.6, help="Needle Moved events per day")
+    parser.add_argument("--score", action="store_true", help="score sessions with the live rules instead of fixed points")
+    parser.add_argument("--db", default=db.DB_FILE)
+    parser.add_argument("--portfolio", help="portfolio name (overrides --db)")
+    parser.add_argument("--fresh", action="store_true", help="replace the DB file instead of appending")
+    args = parser.parse_args()
+
+    days = int(args.years * 365) if args.years else args.days
+    db_file = db.use_portfolio(args.portfolio) if args.portfolio else args.db
+    print(f"🌱 Seeding {days} days of history...")
+    seed_history(days, args.seed, args.end, db_file, args.fresh,
+                 events_per_day=args.events_per_day, catalog_size=args.tasks, bounty_rate=args.bounty_rate,
+                 exam_rate=args.exam_rate, needle_rate=args.needle_rate, score=args.score)
+    print("Refresh your app to see the Heatmap.")
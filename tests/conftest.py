@@ -0,0 +1,73 @@
+import os
+import sys
+from datetime import date, datetime, timedelta
+import pytest
+
+# The modules live flat in the repo root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db
+import ledger
+import rollup
+import seed_data
+import writer
+
+# --- SEEDED LEDGER ---
+@pytest.fixture
+def ledger_db(tmp_path, monkeypatch):
+    # 120 days of seeded history in a fresh portfolio.db under tmp_path.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(db, "DB_FILE", str(tmp_path / "portfolio.db"))
+    seed_data.seed_history(120, 7, db_file=db.DB_FILE, fresh=True, progress=lambda m: None)
+    db.init_schema()
+    yield db.DB_FILE
+    writer.stop_all()
+
+class _Rollback(Exception):
+    pass
+
+def _rebuilt(read):
+    # What read() returns after a rebuild, inside a transaction that is rolled back.
+    try:
+        with db.transaction() as c:
+            rollup.rebuild(c)
+            state = read()
+            raise _Rollback
+    except _Rollback: return state
+
+def _write_randomly(rng, steps=60):
+    # Yields after each write.
+    today = date.today()
+    projects = ledger.get_active_tasks()
+    for _ in range(steps):
+        action = rng.integers(0, 5)
+        if action == 0:
+            name, tier = projects.iloc[rng.integers(0, len(projects))]
+            ledger.log_work(name, int(rng.choice([10, 20, 45, 90])), "t", tier, 8, "Hangout / Activity")
+        elif action == 1: ledger.undo_last_log()
+        elif action == 2:
+            # A backdated session, possibly before the first logged day.
+            when = datetime.combine(today - timedelta(days=int(rng.integers(0, 140))), datetime.min.time()) + timedelta(hours=12)
+            def backdate(c):
+                c.execute(db.LOG_INSERT, db.log_row(when, "Social Life", 30, int(rng.choice([5, 15, 30])), "late"))
+                rollup.refresh_day(c, when.date().isoformat())
+            writer.call(backdate)
+        elif action == 3:
+            def delete_one(c):
+                c.execute("SELECT id, day FROM logs ORDER BY RANDOM() LIMIT 1")
+                row = c.fetchone()
+                c.execute("DELETE FROM logs WHERE id = ?", (row[0],))
+                rollup.refresh_day(c, db.from_day_number(row[1]).isoformat())
+            writer.call(delete_one)
+        else:
+            ledger.manage_task("delete", "Social Life")
+            ledger.manage_task("add", "Social Life", str(rng.choice(["Social", "Core"])))
+        yield action
+
+@pytest.fixture
+def rebuilt():
+    return _rebuilt
+
+@pytest.fixture
+def random_writes():
+    return _write_randomly
@@ -0,0 +1,55 @@
+import os
+from datetime import date
+import pandas as pd
+import archive
+import backup
+import db
+import rollup
+
+# --- COLD TIER ---
+# Archiving moves closed months out of `logs` without changing what any
+# reader sees; restoring puts them back row for row.
+LOGS = "SELECT id, ts, day, project, duration, points, notes FROM logs ORDER BY id"
+SUMMARY = "SELECT * FROM daily_summary ORDER BY day"
+quiet = lambda msg: None
+
+def test_archive_and_restore_round_trip(ledger_db):
+    logs, summary, everything = db.read_sql(LOGS), db.read_sql(SUMMARY), archive.read_logs()
+    moved = archive.archive(progress=quiet)
+    assert moved and db.query_one("SELECT COUNT(*) FROM logs")[0] == len(logs) - moved
+    assert all(os.path.exists(path) for _, path in archive.partitions())
+
+    pd.testing.assert_frame_equal(archive.read_logs(), everything, check_categorical=False)
+    pd.testing.assert_frame_equal(db.read_sql(SUMMARY), summary)
+    with db.transaction() as c: rollup.rebuild(c)
+    pd.testing.assert_frame_equal(db.read_sql(SUMMARY), summary)
+
+    for month, _ in archive.partitions(): archive.restore(month, progress=quiet)
+    assert archive.partitions() == [] and os.listdir(archive.archive_dir()) == []
+    pd.testing.assert_frame_equal(db.read_sql(LOGS), logs)
+    pd.testing.assert_frame_equal(db.read_sql(SUMMARY), summary)
+
+def test_rows_written_into_an_archived_month_join_it(ledger_db):
+    archive.archive(progress=quiet)
+    month, path = archive.partitions()[0]
+    first_ts, last_ts = archive.month_bounds(month)
+    archived = len(archive.read_logs(first_ts, last_ts))
+    when = db.from_epoch_us(first_ts + 12 * 3600 * 10**6)
+    with db.transaction() as c:
+        c.execute(db.LOG_INSERT, db.log_row(when, "Social Life", 30, 15, "late"))
+        rollup.refresh_day(c, when.date().isoformat())
+    assert len(archive.read_logs(first_ts, last_ts)) == archived + 1
+
+    archive.archive(progress=quiet)
+    assert dict(archive.partitions())[month] != path and not os.path.exists(path)
+    assert len(archive.read_month(dict(archive.partitions())[month])) == archived + 1
+    assert len(archive.read_logs(first_ts, last_ts)) == archived + 1
+
+def test_backups_carry_the_partitions(ledger_db):
+    archive.archive(progress=quiet)
+    path = backup.take_backup(db.DB_FILE, date.today())
+    copies = backup.cold_path(path)
+    assert sorted(os.listdir(copies)) == sorted(os.path.basename(p) for _, p in archive.partitions())
+    assert backup.verify(path)
+    os.remove(os.path.join(copies, os.listdir(copies)[0]))
+    assert not backup.verify(path)
@@ -0,0 +1,55 @@
+from datetime import date, timedelta
+import gzip
+import sqlite3
+import pytest
+import backup
+
+# --- RETENTION AND VERIFICATION ---
+@pytest.fixture
+def ledger_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn = sqlite3.connect("portfolio.db")
+    conn.execute("CREATE TABLE logs (id INTEGER PRIMARY KEY, notes TEXT)")
+    conn.executemany("INSERT INTO logs (notes) VALUES (?)", [(f"n{i}",) for i in range(500)])
+    conn.commit()
+    conn.close()
+    return "portfolio.db"
+
+def test_prune_keeps_daily_and_weekly(ledger_file):
+    last = date(2026, 10, 17)
+    days = [last - timedelta(days=i) for i in range(40)]
+    for day in days: backup.take_backup(ledger_file, day)
+    removed = backup.prune(ledger_file, keep_daily=7, keep_weekly=4)
+
+    # The newest 7 days, then the newest day of each of the 4 weeks before them.
+    expected, weeks = set(days[:7]), set()
+    for day in days[7:]:
+        if day.isocalendar()[:2] not in weeks and len(weeks) < 4:
+            weeks.add(day.isocalendar()[:2])
+            expected.add(day)
+    assert {day for day, _ in backup.list_backups(ledger_file)} == expected
+    assert len(removed) == len(days) - len(expected)
+
+def test_prune_leaves_other_portfolios_alone(ledger_file, tmp_path):
+    # A portfolio whose name clashes with the default DB's keeps its own folder.
+    other = tmp_path / "portfolios" / "portfolio.db"
+    other.parent.mkdir()
+    other.write_bytes(open(ledger_file, "rb").read())
+    for i in range(10):
+        backup.take_backup(ledger_file, date(2026, 10, 1) + timedelta(days=i))
+        backup.take_backup(str(other), date(2026, 10, 1) + timedelta(days=i))
+    backup.prune(ledger_file, keep_daily=2, keep_weekly=0)
+    assert len(backup.list_backups(ledger_file)) == 2
+    assert len(backup.list_backups(str(other))) == 10
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_verify_rejects_damaged_backups(ledger_file, compress):
+    path = backup.take_backup(ledger_file, date(2026, 10, 17), compress=compress)
+    assert backup.verify(path)
+    data = open(path, "rb").read()
+    with open(path, "wb") as f: f.write(data[:len(data) // 2])
+    assert not backup.verify(path)
+    if compress:
+        with gzip.open(path, "wb") as f: f.write(b"")
+    else: open(path, "wb").close()
+    assert not backup.verify(path)
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+import db
+import importer
+import writer
+
+# --- CHECKPOINTS AND RESUME ---
+# An import that dies halfway keeps its last committed checkpoint (every
+# --commit-every rows, whatever the batch size) and, run again, ends with the
+# same ledger as one uninterrupted pass.
+PROJECTS = ["News App", "Agentic AI", "Academics", "Social Life", "Volleyball", "Trading Algos"]
+COLUMNS = "timestamp, ts, day, project, duration, points, notes"
+
+class _Crash(Exception):
+    pass
+
+@pytest.fixture
+def sessions_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    n = 1000
+    pd.DataFrame({'timestamp': pd.Timestamp("2026-03-02 07:00") + pd.to_timedelta(range(0, 37 * n, 37), unit='min'),
+                  'project': [PROJECTS[i % len(PROJECTS)] for i in range(n)],
+                  'duration': [(20, 45, 90, 30)[i % 4] for i in range(n)],
+                  'notes': [f"s{i}" for i in range(n)]}).to_csv("sessions.csv", index=False)
+    yield str(tmp_path / "sessions.csv")
+    writer.stop_all()
+
+def _use(monkeypatch, path):
+    monkeypatch.setattr(db, "DB_FILE", path)
+    db.init_schema()
+
+def _crash_after(parts):
+    seen = []
+    def progress(msg):
+        if "rows/s" not in msg: return
+        seen.append(msg)
+        if len(seen) == parts: raise _Crash
+    return progress
+
+def test_resume_matches_one_pass(sessions_csv, monkeypatch):
+    _use(monkeypatch, "once.db")
+    importer.import_sessions(sessions_csv, progress=lambda m: None)
+    expected = db.read_sql(f"SELECT {COLUMNS} FROM logs ORDER BY id")
+
+    _use(monkeypatch, "resumed.db")
+    # Chunks of 400 cut at every 150th row: parts end at rows 150, 300,
+    # 400, 450, 600, ... and the crash in the 5th leaves the checkpoint at 450.
+    with pytest.raises(_Crash):
+        importer.import_sessions(sessions_csv, batch_size=400, commit_every=150, progress=_crash_after(5))
+    assert db.query_one("SELECT rows_done FROM import_progress")[0] == 450
+    assert db.query_one("SELECT COUNT(*) FROM logs")[0] == 450
+
+    assert importer.import_sessions(sessions_csv, batch_size=400, commit_every=150, progress=lambda m: None) == 1000
+    pd.testing.assert_frame_equal(db.read_sql(f"SELECT {COLUMNS} FROM logs ORDER BY id"), expected)
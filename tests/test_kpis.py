@@ -0,0 +1,38 @@
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+import db
+import kpis
+
+# --- KPI STORE ---
+# The windows a write touches are refreshed in place; the store must match
+# a rebuild after every write, agree with the day rollups it is built on,
+# and read the same when it has to compute a stale day's windows live.
+def _kpis():
+    return db.read_sql("SELECT * FROM kpis ORDER BY span, project, name")
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_matches_rebuild(ledger_db, rebuilt, random_writes, seed):
+    for _ in random_writes(np.random.default_rng(seed)):
+        pd.testing.assert_frame_equal(_kpis(), rebuilt(_kpis), check_dtype=False)
+
+def test_windows_match_the_rollups(ledger_db):
+    today = date.today()
+    values = kpis.read(db.get_conn().cursor(), today)
+    daily = db.read_sql("SELECT * FROM daily_summary")
+    projects = db.read_sql("SELECT * FROM project_summary")
+    for span in kpis.WINDOWS:
+        first, last = kpis.bounds(span, today)
+        days = daily[(daily['day'] >= first) & (daily['day'] <= last)]
+        assert kpis.value(values, span, 'points') == days['total_points'].sum()
+        assert kpis.value(values, span, 'deep_work_tokens') == days['deep_work_tokens'].sum()
+        assert kpis.value(values, span, 'active_days') == len(days)
+        worked = projects[(projects['day'] >= first) & (projects['day'] <= last)].groupby('project')['duration'].sum()
+        if len(worked): assert kpis.top_project(values, span) == sorted(worked[worked == worked.max()].index)[0]
+
+def test_stale_store_reads_live(ledger_db):
+    c = db.get_conn().cursor()
+    stored = kpis.read(c)
+    with db.transaction() as w: w.execute("UPDATE kpi_state SET as_of = ?", ((date.today() - timedelta(days=1)).isoformat(),))
+    assert kpis.read(c) == pytest.approx(stored)
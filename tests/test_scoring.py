@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scoring
+
+# --- BATCH VS SEQUENTIAL ---
+# score_batch must score every session exactly as a run of score_session
+# calls would, each against the rows logged before it that day.
+PROJECTS = [("News App", "Core"), ("Trading Algos", "Core"), ("Agentic AI", "Deep Work"),
+            ("Volleyball", "Rent"), ("Academics", "Rent"), ("Gym", "Rent"), ("Social Life", "Social")]
+SUBTYPES = list(scoring.SOCIAL_POINTS) + [None]
+
+def _random_rows(rng, n, days=4):
+    # Distinct minutes, so the order of sessions is never a tie.
+    minutes = np.sort(rng.choice(days * 24 * 60, size=n, replace=False))
+    picks = rng.integers(0, len(PROJECTS), n)
+    return pd.DataFrame({
+        'timestamp': pd.Timestamp("2026-03-02") + pd.to_timedelta(minutes, unit='min'),
+        'project': [PROJECTS[i][0] for i in picks],
+        'tier': [PROJECTS[i][1] for i in picks],
+        'duration': rng.choice([5, 15, 20, 30, 45, 60, 89, 90, 120], n),
+        'sleep_hours': rng.choice([4.0, 6.0, 7.0, 8.0], n),
+        'social_subtype': [SUBTYPES[i] for i in rng.integers(0, len(SUBTYPES), n)],
+        'notes': [f"n{i}" for i in range(n)],
+    })
+
+def _sequential(sessions, history, activations):
+    # Replays history and sessions in time order through score_session.
+    events = [(t, 0, i) for i, t in enumerate(history['timestamp'])] + \
+             [(t, 1, i) for i, t in enumerate(sessions['timestamp'])]
+    done = {}    # (day, project) -> [(duration, points)]
+    scores = [None] * len(sessions)
+    for t, is_session, i in sorted(events):
+        row = (sessions if is_session else history).iloc[i]
+        key = (t.normalize(), row['project'])
+        if is_session:
+            prior = pd.DataFrame(done.get(key, []), columns=['duration', 'points'])
+            exam = bool(scoring.exam_mode_at([t], activations)[0])
+            session = scoring.Session(row['project'], row['tier'], int(row['duration']), float(row['sleep_hours']),
+                                      row['social_subtype'], row['notes'])
+            score = scores[i] = scoring.score_session(session, scoring.DayContext.from_logs(prior, t.hour, exam))
+            points = score.points
+        else: points = int(row['points'])
+        done.setdefault(key, []).append((int(row['duration']), points))
+    return scores
+
+@pytest.mark.parametrize("seed", range(20))
+def test_score_batch_matches_score_session(seed):
+    rng = np.random.default_rng(seed)
+    rows = _random_rows(rng, 160)
+    is_history = rng.random(len(rows)) < 0.25
+    history = rows[is_history].reset_index(drop=True)
+    history['points'] = rng.choice([0, 5, 10, 15, 30], len(history))
+    sessions = rows[~is_history].reset_index(drop=True)
+    activations = pd.to_datetime(["2026-03-03 10:00"]) if seed % 2 else pd.DatetimeIndex([])
+
+    batch = scoring.score_batch(sessions, history[['timestamp', 'project', 'duration', 'points']], activations)
+    expected = _sequential(sessions, history, activations)
+    assert batch['points'].tolist() == [s.points for s in expected]
+    assert batch['notes'].tolist() == [s.notes for s in expected]
+    assert batch['vampire'].tolist() == [s.vampire for s in expected]
@@ -0,0 +1,29 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+import db
+import rollup
+
+# --- PERSISTED SOCIAL EMA ---
+# The stored num/den state is advanced on every write; it must match a
+# rebuild after each one, and its value must be pandas' ewm(span=7) over
+# the daily social points.
+def _ema():
+    return db.query_one("SELECT first_day, day, num, den FROM social_ema")
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_matches_rebuild(ledger_db, rebuilt, random_writes, seed):
+    for _ in random_writes(np.random.default_rng(seed)):
+        ema, expected = _ema(), rebuilt(_ema)
+        assert ema[:2] == expected[:2]
+        assert ema[2:] == pytest.approx(expected[2:], rel=1e-9)
+
+def test_matches_pandas_ewm(ledger_db, random_writes):
+    for _ in random_writes(np.random.default_rng(11)): pass
+    today = date.today()
+    daily = db.read_sql("SELECT day, social_points FROM daily_summary ORDER BY day")
+    series = pd.Series(daily['social_points'].fillna(0).to_numpy(), index=pd.to_datetime(daily['day']))
+    series = series.reindex(pd.date_range(series.index.min(), pd.Timestamp(today)), fill_value=0)
+    expected = series.ewm(span=rollup.EMA_SPAN).mean().iloc[-1]
+    assert rollup.social_ema(db.get_conn().cursor(), today) == pytest.approx(expected, rel=1e-9)
@@ -0,0 +1,151 @@
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+import db
+
+# --- WRITE-BEHIND QUEUE ---
+# Every ledger mutation is a command fn(cursor, *args) run by a single writer
+# thread per database file, so sessions in one process never race each other
+# for the write lock. The writer folds whatever is queued into one transaction
+# (one fsync), runs each command inside its own savepoint so a failing command
+# only undoes itself, and resolves each command's future once the batch has
+# committed. The queue is bounded: submit() blocks while it is full.
+# Readers use their own pooled connections and, under WAL, never wait on it.
+# A writer with nothing to do for IDLE_TIMEOUT closes its connection and
+# retires; the next command for its file starts a new one.
+MAX_PENDING = 256
+GROUP_MAX = 64
+GROUP_WINDOW = 0.002    # seconds to wait for more commands before committing
+SUBMIT_TIMEOUT = 30     # seconds submit() may block on a full queue
+CALL_TIMEOUT = 120      # seconds call() waits for its command to commit
+IDLE_TIMEOUT = 300      # seconds without a command before a writer retires
+
+_writers = {}
+_lock = threading.Lock()
+_STOP = object()
+
+class Writer:
+    def __init__(self, path):
+        self.path = path
+        self.queue = queue.Queue(MAX_PENDING)
+        self.error = None       # set if the writer could not open the DB file
+        self.retired = False
+        self.accepting = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name=f"ledger-writer:{path}", daemon=True)
+        self.thread.start()
+
+    def submit(self, fn, *args, **kwargs):
+        # Returns None once the writer has retired; ask writer_for for a new one.
+        future = Future()
+        with self.accepting:
+            if self.error: raise self.error
+            if self.retired: return None
+            try: self.queue.put((fn, args, kwargs, future), timeout=SUBMIT_TIMEOUT)
+            except queue.Full:
+                raise TimeoutError(f"Ledger writer for {self.path} is backed up ({MAX_PENDING} commands pending).") from None
+        return future
+
+    def stop(self):
+        self.queue.put(_STOP)
+        self.thread.join()
+
+    def _next_batch(self):
+        # None after IDLE_TIMEOUT without a command.
+        try: batch = [self.queue.get(timeout=IDLE_TIMEOUT)]
+        except queue.Empty: return None
+        deadline = time.monotonic() + GROUP_WINDOW
+        while len(batch) < GROUP_MAX and batch[-1] is not _STOP:
+            try: batch.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty: break
+        return batch
+
+    def _apply(self, conn, commands):
+        # One attempt at the whole batch; retry_locked replays it if the lock is lost.
+        outcomes = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            c = conn.cursor()
+            for fn, args, kwargs, _ in commands:
+                c.execute("SAVEPOINT command")
+                try:
+                    outcomes.append((fn(c, *args, **kwargs), None))
+                except Exception as e:
+                    c.execute("ROLLBACK TO command")
+                    outcomes.append((None, e))
+                c.execute("RELEASE command")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return outcomes
+
+    def _fail(self, error):
+        # Unregisters this writer, so the next submit starts a fresh one, and
+        # fails whatever was already queued.
+        with self.accepting: self.error = error
+        with _lock:
+            if _writers.get(self.path) is self: del _writers[self.path]
+        while True:
+            try: cmd = self.queue.get_nowait()
+            except queue.Empty: return
+            if cmd is not _STOP and cmd[3].set_running_or_notify_cancel(): cmd[3].set_exception(error)
+
+    def _retire(self):
+        # Unregisters this writer unless a command arrived in the meantime.
+        with self.accepting:
+            if not self.queue.empty(): return False
+            self.retired = True
+            with _lock:
+                if _writers.get(self.path) is self: del _writers[self.path]
+        return True
+
+    def _run(self):
+        try: conn = db.connect(self.path)
+        except Exception as e: return self._fail(e)
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                if self._retire(): break
+                continue
+            commands = [cmd for cmd in batch if cmd is not _STOP and cmd[3].set_running_or_notify_cancel()]
+            if commands:
+                try: outcomes = db.retry_locked(self._apply, conn, commands)
+                except Exception as e: outcomes = [(None, e)] * len(commands)
+                else: db.write_counts[self.path] += 1
+                for (_, _, _, future), (result, error) in zip(commands, outcomes):
+                    if error is None: future.set_result(result)
+                    else: future.set_exception(error)
+            if batch[-1] is _STOP: break
+        conn.close()
+
+def writer_for(path=None):
+    path = path or db.current_file()
+    with _lock:
+        writer = _writers.get(path)
+        if writer is None: writer = _writers[path] = Writer(path)
+    return writer
+
+def submit(fn, *args, **kwargs):
+    # Returns a Future for fn(cursor, *args, **kwargs) on the current DB file.
+    future = None
+    while future is None: future = writer_for().submit(fn, *args, **kwargs)
+    return future
+
+def call(fn, *args, **kwargs):
+    # Runs fn on the writer and waits for it to commit; re-raises its error.
+    # A writer that stops answering raises TimeoutError rather than hanging
+    # the caller (the command may still commit later).
+    future = submit(fn, *args, **kwargs)
+    try: return future.result(CALL_TIMEOUT)
+    except FutureTimeout:
+        raise TimeoutError(f"Ledger writer for {db.current_file()} did not commit within {CALL_TIMEOUT}s.") from None
+
+@atexit.register
+def stop_all():
+    # Drains every queue so commands submitted without waiting still land.
+    with _lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers: writer.stop()